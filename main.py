@@ -17,7 +17,10 @@ def main():
     parser.add_argument("dest", type=Path, help="Destination directory")
     parser.add_argument("--dry-run", action="store_true", help="Don't actually move/write files")
     parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers (default: 4)")
+    parser.add_argument("--scan-threads", type=int, default=None, help="Number of threads that stat files during discovery (default: 4x --workers)")
     parser.add_argument("--batch-size", type=int, default=1000, help="Batch size for ExifTool operations (default: 1000)")
+    parser.add_argument("--reflink", action="store_true", help="Clone files with reflinks on filesystems that support it (btrfs, XFS)")
+    parser.add_argument("--dedup", action="store_true", help="Skip source files whose content is identical to another source file")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     parser.add_argument("--db-path", type=Path, default=Path(".takeout_import.db"), help="Path to SQLite database file")
     parser.add_argument("--memory-db", action="store_true", help="Use in-memory database (no persistence)")
@@ -55,7 +58,7 @@ def main():
         persistence = PersistenceManager.file_db(args.db_path)
         logger.info(f"Using SQLite database at {args.db_path}")
 
-    processor = MediaProcessor(args.source, args.dest, persistence, args.dry_run, max_workers=args.workers, batch_size=args.batch_size)
+    processor = MediaProcessor(args.source, args.dest, persistence, args.dry_run, max_workers=args.workers, batch_size=args.batch_size, reflink=args.reflink, dedup=args.dedup, scan_workers=args.scan_threads)
     processor.process()
 
 if __name__ == "__main__":
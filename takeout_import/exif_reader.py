@@ -0,0 +1,223 @@
+import re
+import struct
+from pathlib import Path
+from typing import Optional, Dict
+
+from .media_type import MediaType
+from .media_metadata import MediaMetadata
+from .utils import map_file
+
+# Native reader for the common case of JPEG/PNG files whose only metadata is plain EXIF dates.
+# ExifTool stays the source of truth: whenever a file carries anything that could contribute
+# GPS, people or URL tags (or anything we don't recognize), we return None and the caller
+# falls back to ExifTool.
+
+NATIVE_EXTENSIONS = {'.jpg', '.jpeg', '.jpe', '.png'}
+
+# JPEG metadata segments sit in front of the image data; this is plenty for typical headers
+JPEG_HEAD_SIZE = 128 * 1024
+
+JPEG_SOI = b'\xff\xd8'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+EXIF_HEADER = b'Exif\x00\x00'
+
+# PNG chunks that never carry date, GPS, people or URL metadata
+PNG_PLAIN_CHUNKS = {
+    b'IHDR', b'PLTE', b'IDAT', b'gAMA', b'cHRM', b'sRGB', b'iCCP',
+    b'pHYs', b'sBIT', b'bKGD', b'tRNS', b'hIST', b'sPLT',
+}
+
+# TIFF tags
+TAG_MODIFY_DATE = 0x0132
+TAG_XMP = 0x02bc
+TAG_IPTC = 0x83bb
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATE_TIME_ORIGINAL = 0x9003
+TAG_CREATE_DATE = 0x9004
+TAG_USER_COMMENT = 0x9286
+
+TYPE_ASCII = 2
+TYPE_LONG = 4
+
+EXIF_DATE_RE = re.compile(r'\d{4}:\d\d:\d\d \d\d:\d\d:\d\d$')
+
+_U16 = {'<': struct.Struct('<H'), '>': struct.Struct('>H')}
+_U32 = {'<': struct.Struct('<I'), '>': struct.Struct('>I')}
+_IFD_ENTRY = {'<': struct.Struct('<HHII'), '>': struct.Struct('>HHII')}
+_BE_U16 = _U16['>']
+_BE_U32 = _U32['>']
+
+
+def read_metadata_native(file_path: Path, media_type: MediaType) -> Optional[MediaMetadata]:
+    """Reads metadata without ExifTool if the file's metadata is simple enough, else returns None."""
+    if file_path.suffix.lower() not in NATIVE_EXTENSIONS:
+        return None
+
+    try:
+        with map_file(file_path, JPEG_HEAD_SIZE) as head:
+            signature = bytes(head[:8])
+            data = _parse(_read_jpeg, head) if signature.startswith(JPEG_SOI) else None
+        if signature == PNG_SIGNATURE:
+            # PNG metadata chunks may follow the image data, so walk the whole file
+            with map_file(file_path) as view:
+                data = _parse(_read_png, view)
+    except OSError:
+        return None
+
+    if data is None:
+        return None
+    return MediaMetadata.from_exif(data, media_type)
+
+
+def _parse(reader, view: memoryview) -> Optional[Dict[str, str]]:
+    # Handle malformed data here, while the mapping is still open: a propagating traceback
+    # would keep slices of the view alive and stop the mapping from being closed.
+    try:
+        return reader(view)
+    except (ValueError, struct.error):
+        return None
+
+
+def _read_jpeg(view: memoryview) -> Optional[Dict[str, str]]:
+    data = {}
+    exif_seen = False
+    pos = 2
+    while pos + 4 <= len(view):
+        if view[pos] != 0xFF:
+            return None
+        marker = view[pos + 1]
+        if marker == 0xFF:
+            # Fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers
+            pos += 2
+            continue
+        if marker in (0xDA, 0xD9):
+            # Start of scan / end of image: all metadata segments have been seen
+            return data
+
+        length = _BE_U16.unpack_from(view, pos + 2)[0]
+        segment = view[pos + 4:pos + 2 + length]
+        if length < 2 or len(segment) != length - 2:
+            return None
+
+        if marker == 0xE1:
+            if exif_seen or segment[:6] != EXIF_HEADER:
+                # XMP or another APP1 payload
+                return None
+            exif = _read_tiff(segment[6:])
+            if exif is None:
+                return None
+            data.update(exif)
+            exif_seen = True
+        elif marker == 0xE2:
+            if segment[:12] != b'ICC_PROFILE\x00' and segment[:4] != b'MPF\x00':
+                return None
+        elif 0xE0 < marker <= 0xEF and marker != 0xEE:
+            # Other application segments (IPTC, vendor data, ...); JFIF (APP0) and Adobe (APP14) are fine
+            return None
+
+        pos += 2 + length
+    # Ran out of header before the image data
+    return None
+
+
+def _read_png(view: memoryview) -> Optional[Dict[str, str]]:
+    data = {}
+    exif_seen = False
+    pos = 8
+    while pos + 8 <= len(view):
+        length = _BE_U32.unpack_from(view, pos)[0]
+        chunk_type = bytes(view[pos + 4:pos + 8])
+        chunk = view[pos + 8:pos + 8 + length]
+        if len(chunk) != length:
+            return None
+
+        if chunk_type == b'IEND':
+            return data
+        if chunk_type == b'eXIf':
+            exif = None if exif_seen else _read_tiff(chunk)
+            if exif is None:
+                return None
+            data.update(exif)
+            exif_seen = True
+        elif chunk_type not in PNG_PLAIN_CHUNKS:
+            # Text, time and unknown chunks may all carry metadata ExifTool would report
+            return None
+
+        # Length, type, data and CRC
+        pos += 12 + length
+    return None
+
+
+def _read_tiff(block: memoryview) -> Optional[Dict[str, str]]:
+    """Reads the EXIF dates from a TIFF structure, or None if it holds more than we handle."""
+    if len(block) < 8:
+        return None
+    byte_order = bytes(block[:2])
+    if byte_order == b'II':
+        order = '<'
+    elif byte_order == b'MM':
+        order = '>'
+    else:
+        return None
+    if _U16[order].unpack_from(block, 2)[0] != 42:
+        return None
+
+    ifd0 = _read_ifd(block, _U32[order].unpack_from(block, 4)[0], order)
+    if ifd0 is None or TAG_GPS_IFD in ifd0 or TAG_XMP in ifd0 or TAG_IPTC in ifd0:
+        return None
+
+    data = {}
+    if not _add_date(data, 'EXIF:ModifyDate', block, ifd0.get(TAG_MODIFY_DATE)):
+        return None
+
+    exif_pointer = ifd0.get(TAG_EXIF_IFD)
+    if exif_pointer is not None:
+        entry_type, count, value = exif_pointer
+        if entry_type != TYPE_LONG or count != 1:
+            return None
+        exif_ifd = _read_ifd(block, value, order)
+        if exif_ifd is None or TAG_USER_COMMENT in exif_ifd:
+            return None
+        if not _add_date(data, 'EXIF:DateTimeOriginal', block, exif_ifd.get(TAG_DATE_TIME_ORIGINAL)):
+            return None
+        if not _add_date(data, 'EXIF:CreateDate', block, exif_ifd.get(TAG_CREATE_DATE)):
+            return None
+    return data
+
+
+def _read_ifd(block: memoryview, offset: int, order: str) -> Optional[Dict[int, tuple]]:
+    """Returns tag -> (type, count, raw value/offset) for one IFD."""
+    if offset + 2 > len(block):
+        return None
+    count = _U16[order].unpack_from(block, offset)[0]
+    if offset + 2 + count * 12 > len(block):
+        return None
+    entry_struct = _IFD_ENTRY[order]
+    entries = {}
+    for i in range(count):
+        tag, entry_type, value_count, value = entry_struct.unpack_from(block, offset + 2 + i * 12)
+        if entry_type == TYPE_ASCII and value_count <= 4:
+            # Short strings are stored inline; keep their position instead of the raw value
+            value = offset + 2 + i * 12 + 8
+        entries[tag] = (entry_type, value_count, value)
+    return entries
+
+
+def _add_date(data: Dict[str, str], key: str, block: memoryview, entry: Optional[tuple]) -> bool:
+    """Adds a date tag to data; returns False if the value is one we don't handle."""
+    if entry is None:
+        return True
+    entry_type, count, start = entry
+    if entry_type != TYPE_ASCII or start + count > len(block):
+        return False
+    value = bytes(block[start:start + count]).split(b'\x00', 1)[0].decode('ascii', 'replace')
+    if not EXIF_DATE_RE.match(value):
+        # Empty or unusual values: let ExifTool decide how to report them
+        return False
+    data[key] = value
+    return True
@@ -1,36 +1,106 @@
+import errno
+import hashlib
 import shutil
 import os
+import stat
 import logging
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+
+from .utils import map_file
 
 logger = logging.getLogger(__name__)
 
+# ioctl request number for FICLONE (linux/fs.h), used to reflink whole files
+FICLONE = 0x40049409
+
+# BLAKE2b is faster than MD5/SHA-256 in software and ships with every hashlib
+HASH_ALGORITHM = 'blake2b'
+HASH_CHUNK_SIZE = 1024 * 1024
+# Buffer for the userspace copy fallback; shutil's default of 64 KiB is small for videos
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+# Files at least this large are read with sequential readahead advice; smaller ones fit the default window
+SEQUENTIAL_ADVICE_SIZE = 4 * 1024 * 1024
+
+# copy_file_range errors that mean "not possible here" rather than a real I/O failure
+_COPY_RANGE_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL}
+
+# xattr errors shutil.copystat ignores: unsupported by a filesystem or not ours to set
+_XATTR_UNSUPPORTED = {errno.EPERM, errno.EACCES, errno.ENOTSUP, errno.ENODATA, errno.EINVAL}
+
+def _advise_sequential(fd: int, size: int):
+    """Asks the kernel for deeper readahead on a large file that is about to be read start to end."""
+    if size >= SEQUENTIAL_ADVICE_SIZE and hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            # Only a hint
+            pass
+
 class FileOrganizer:
     """Handles file organization, naming, and moving/copying."""
     
-    def __init__(self, dest_root: Path, dry_run: bool = False):
+    def __init__(self, dest_root: Path, dry_run: bool = False, reflink: bool = False):
         self.dest_root = dest_root
         self.dry_run = dry_run
+        self.reflink = reflink
+        # Target directories already created during this run. Copies run on worker threads,
+        # but a racing duplicate mkdir is harmless with exist_ok=True.
+        self._created_dirs: set[Path] = set()
+        # (path, size, mtime) -> content digest
+        self._digests: dict[tuple[str, int, float], str] = {}
+        # (year, month) -> dest_root/YYYY/MM; Takeouts cluster in a small number of months
+        self._month_dirs: dict[tuple[int, int], Path] = {}
+        # (month start, next month start, directory) of the last resolved timestamp
+        self._month_span: tuple[float, float, Path] = (0.0, 0.0, dest_root)
 
     def get_target_path(self, timestamp: float, original_filename: str) -> Path:
         """Determines the target path based on timestamp."""
-        dt = datetime.fromtimestamp(timestamp)
-        year = dt.strftime("%Y")
-        month = dt.strftime("%m")
+        directory = self._month_dir(timestamp)
         
         # Handle Motion Photos: Rename .mp to .mp4
-        path = Path(original_filename)
-        if path.suffix.lower() == '.mp':
-            filename = path.with_suffix('.mp4').name
+        dot = original_filename.rfind('.')
+        if dot > 0 and original_filename[dot:].lower() == '.mp':
+            filename = original_filename[:dot] + '.mp4'
         else:
             filename = original_filename
             
-        return self.dest_root / year / month / filename
+        return directory / filename
 
-    def resolve_collision(self, target_path: Path) -> Path:
-        """Resolves filename collisions by appending a counter."""
-        if not target_path.exists():
+    def _month_dir(self, timestamp: float) -> Path:
+        """Returns the local YEAR/MONTH directory, reusing the last result while inside the same month."""
+        start, end, directory = self._month_span
+        if start <= timestamp < end:
+            return directory
+
+        dt = datetime.fromtimestamp(timestamp)
+        key = (dt.year, dt.month)
+        directory = self._month_dirs.get(key)
+        if directory is None:
+            directory = self.dest_root / f"{dt.year:04d}" / f"{dt.month:02d}"
+            self._month_dirs[key] = directory
+        month_start = datetime(dt.year, dt.month, 1)
+        if dt.month == 12:
+            next_month = datetime(dt.year + 1, 1, 1)
+        else:
+            next_month = datetime(dt.year, dt.month + 1, 1)
+        # Local month boundaries, so DST and time zones are handled by datetime as before
+        self._month_span = (month_start.timestamp(), next_month.timestamp(), directory)
+        return directory
+
+    def resolve_collision(self, target_path: Path, existing_names: Optional[set[str]] = None) -> Path:
+        """Resolves filename collisions by appending a counter.
+        
+        existing_names, if given, is a listing of the target directory (see list_names)
+        that is checked instead of stat-ing each candidate.
+        """
+        if existing_names is None:
+            exists = Path.exists
+        else:
+            exists = lambda path: path.name in existing_names
+
+        if not exists(target_path):
             return target_path
         
         parent = target_path.parent
@@ -41,26 +111,175 @@ class FileOrganizer:
         while True:
             new_name = f"{stem}_{counter}{suffix}"
             new_path = parent / new_name
-            if not new_path.exists():
+            if not exists(new_path):
                 return new_path
             counter += 1
 
+    @staticmethod
+    def list_names(directory: Path) -> set[str]:
+        """Returns the names in directory, or an empty set if it doesn't exist yet."""
+        try:
+            return set(os.listdir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            return set()
+
     def copy_file(self, src: Path, dest: Path, timestamp: float):
         """Copies file to destination and updates modification time."""
         if self.dry_run:
-            logger.info(f"[DRY RUN] Copy {src} -> {dest}")
+            logger.info("[DRY RUN] Copy %s -> %s", src, dest)
             return
 
         try:
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dest)
-            
-            # Update mtime
-            os.utime(dest, (timestamp, timestamp))
-            logger.debug(f"Copied {src.name} to {dest}")
+            self._ensure_dir(dest.parent)
+            self._copy_contents(src, dest, timestamp)
+            logger.debug("Copied %s to %s", src.name, dest)
         except Exception as e:
             logger.error(f"Failed to copy {src} to {dest}: {e}")
 
+    def _copy_contents(self, src: Path, dest: Path, timestamp: float):
+        """Copies file data in the kernel (reflink or copy_file_range) where possible,
+        then the permission bits and extended attributes, and sets the modification time to timestamp."""
+        if not hasattr(os, 'copy_file_range'):
+            shutil.copyfile(src, dest)
+            shutil.copystat(src, dest)
+            os.utime(dest, (timestamp, timestamp))
+            return
+
+        with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+            src_fd = fsrc.fileno()
+            dst_fd = fdst.fileno()
+            src_stat = os.fstat(src_fd)
+            if not (self.reflink and self._reflink(src_fd, dst_fd)):
+                _advise_sequential(src_fd, src_stat.st_size)
+                self._copy_range(fsrc, fdst, src_stat.st_size)
+
+            # Apply mode and times through the open descriptor instead of copystat + utime,
+            # which stat the source again and look up the destination path twice.
+            # Access and modification time are both set to timestamp, so only the mode and
+            # extended attributes are copied.
+            fdst.flush()
+            self._copy_xattrs(src_fd, dst_fd)
+            os.fchmod(dst_fd, stat.S_IMODE(src_stat.st_mode))
+            os.utime(dst_fd, (timestamp, timestamp))
+
+    @staticmethod
+    def _copy_xattrs(src_fd: int, dst_fd: int):
+        """Copies extended attributes between open files, skipping ones that can't be set,
+        as shutil.copystat does."""
+        if not hasattr(os, 'listxattr'):
+            return
+        try:
+            names = os.listxattr(src_fd)
+        except OSError as e:
+            if e.errno not in _XATTR_UNSUPPORTED:
+                raise
+            return
+        for name in names:
+            try:
+                os.setxattr(dst_fd, name, os.getxattr(src_fd, name))
+            except OSError as e:
+                if e.errno not in _XATTR_UNSUPPORTED:
+                    raise
+
+    @staticmethod
+    def _copy_range(fsrc, fdst, size: int):
+        """Copies size bytes with copy_file_range, falling back to sendfile, then a userspace copy."""
+        remaining = size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    if remaining == size:
+                        # Some kernels and filesystems (FUSE, overlayfs, procfs-like files)
+                        # report "nothing copied" instead of an error
+                        break
+                    raise OSError(errno.EIO, f"copy_file_range stopped after {size - remaining} of {size} bytes")
+                remaining -= copied
+            else:
+                return
+        except OSError as e:
+            if e.errno not in _COPY_RANGE_UNSUPPORTED:
+                raise
+        # Start over, e.g. across filesystems on kernels before 5.3
+        fdst.seek(0)
+        fdst.truncate()
+        FileOrganizer._copy_fallback(fsrc, fdst, size)
+
+    @staticmethod
+    def _copy_fallback(fsrc, fdst, size: int):
+        if hasattr(os, 'sendfile'):
+            # Still copies in the kernel, without a round trip through userspace buffers
+            offset = 0
+            try:
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        if offset == 0:
+                            break
+                        raise OSError(errno.EIO, f"sendfile stopped after {offset} of {size} bytes")
+                    offset += sent
+                else:
+                    return
+            except OSError as e:
+                if e.errno not in _COPY_RANGE_UNSUPPORTED:
+                    raise
+            fdst.seek(0)
+            fdst.truncate()
+        fsrc.seek(0)
+        shutil.copyfileobj(fsrc, fdst, COPY_BUFFER_SIZE)
+
+    @staticmethod
+    def _reflink(src_fd: int, dst_fd: int) -> bool:
+        """Clones src into dst on filesystems with reflink support (btrfs, XFS)."""
+        try:
+            import fcntl
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return True
+        except (ImportError, OSError):
+            return False
+
+    def _ensure_dir(self, directory: Path):
+        """Creates directory once per run; files cluster in a few YEAR/MONTH folders."""
+        if directory not in self._created_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(directory)
+
+    def file_digest(self, path: Path, size: int, mtime: float) -> str:
+        """Returns the content hash of a file, cached per (path, size, mtime).
+        
+        Safe to call from several threads; hashlib releases the GIL while hashing.
+        """
+        key = (str(path), size, mtime)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._hash_file(path)
+            self._digests[key] = digest
+        return digest
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: reads into a reused buffer entirely in C
+            with open(path, 'rb') as f:
+                _advise_sequential(f.fileno(), os.fstat(f.fileno()).st_size)
+                return hashlib.file_digest(f, HASH_ALGORITHM).hexdigest()
+        
+        # Older Pythons: hash the memory-mapped file in 1 MiB slices, so no read buffers are copied
+        hasher = hashlib.new(HASH_ALGORITHM)
+        with map_file(path) as view:
+            for offset in range(0, len(view), HASH_CHUNK_SIZE):
+                hasher.update(view[offset:offset + HASH_CHUNK_SIZE])
+        return hasher.hexdigest()
+
+    def has_same_content(self, src: Path, src_size: int, src_mtime: float, dest: Path) -> bool:
+        """Checks if dest is a byte-for-byte copy of src; sizes are compared before hashing."""
+        try:
+            if dest.stat().st_size != src_size:
+                return False
+            return self.file_digest(src, src_size, src_mtime) == self._hash_file(dest)
+        except OSError:
+            return False
+
     def is_identical(self, src: Path, dest: Path) -> bool:
         """Checks if two files are identical based on size and mtime."""
         if not dest.exists():
@@ -1,15 +1,119 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
+from sys import intern
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from .media_type import MediaType
 
-@dataclass
+# Tag kinds for the single-pass ExifTool parser
+_DATE, _GPS, _NAMED = range(3)
+
+# Date tags in order of preference
+EXIF_DATE_TAGS = ('DateTimeOriginal', 'CreateDate', 'ModifyDate', 'DateCreated')
+EXIF_DATE_PRIORITY = {tag: priority for priority, tag in enumerate(EXIF_DATE_TAGS)}
+EXIF_PEOPLE_TAGS = ('XMP:Subject', 'XMP:PersonInImage', 'IPTC:Keywords')
+EXIF_URL_TAGS = ('XMP:UserComment', 'ExifIFD:UserComment')
+EXIF_NAMED_TAGS = frozenset(EXIF_PEOPLE_TAGS + EXIF_URL_TAGS)
+
+# Tag name (without group) -> kind
+EXIF_TAG_KINDS = {
+    **{tag: _DATE for tag in EXIF_DATE_TAGS},
+    **{tag: _GPS for tag in ('GPSLatitude', 'GPSLongitude', 'GPSAltitude', 'GPSCoordinates', 'GPSLatitudeRef', 'GPSLongitudeRef')},
+    **{tag.split(':')[-1]: _NAMED for tag in EXIF_NAMED_TAGS},
+}
+
+@dataclass(slots=True)
 class GpsData:
     latitude: float
     longitude: float
     altitude: Optional[float] = None
 
-@dataclass
+def _format_exif_datetime(dt: datetime) -> str:
+    """Formats dt as "YYYY:MM:DD HH:MM:SS"; %-formatting skips strftime's format parsing."""
+    return "%04d:%02d:%02d %02d:%02d:%02d" % (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+
+@lru_cache(maxsize=4096)
+def _format_timestamp(ts: float) -> tuple[str, str]:
+    """Returns the local and UTC ExifTool date strings for ts; burst shots often share it."""
+    return (_format_exif_datetime(datetime.fromtimestamp(ts)),
+            _format_exif_datetime(datetime.fromtimestamp(ts, timezone.utc)))
+
+def _parse_exif_datetime(value: str) -> datetime:
+    """Parses "YYYY:MM:DD HH:MM:SS" like strptime, without strptime's per-call format handling."""
+    if (len(value) == 19 and value[4] == ':' and value[7] == ':' and value[10] == ' '
+            and value[13] == ':' and value[16] == ':' and value.isascii()):
+        if (value[0:4] + value[5:7] + value[8:10] + value[11:13] + value[14:16] + value[17:19]).isdigit():
+            # datetime() raises ValueError for out-of-range fields, as strptime does
+            return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                            int(value[11:13]), int(value[14:16]), int(value[17:19]))
+    # Anything unusual (single-digit fields, stray whitespace, ...) keeps strptime's exact rules
+    return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
+
+class _ExifGps:
+    """Collects GPS tags in ExifTool output order; later tags override earlier ones."""
+
+    def __init__(self):
+        self.lat = None
+        self.lon = None
+        self.alt = None
+        self.lat_ref = None
+        self.lon_ref = None
+
+    def update(self, tag: str, v: Any):
+        if tag == 'GPSLatitude':
+            self.lat = v
+        elif tag == 'GPSLongitude':
+            self.lon = v
+        elif tag == 'GPSAltitude':
+            self.alt = v
+        elif tag == 'GPSCoordinates':
+            # QuickTime:GPSCoordinates format: "lat, lon, alt" or "lat, lon"
+            try:
+                parts = [float(x.strip()) for x in v.split(',')]
+                if len(parts) >= 2:
+                    self.lat = parts[0]
+                    self.lon = parts[1]
+                    if len(parts) >= 3:
+                        self.alt = parts[2]
+            except (ValueError, AttributeError):
+                pass
+        elif tag == 'GPSLatitudeRef':
+            self.lat_ref = v
+        elif tag == 'GPSLongitudeRef':
+            self.lon_ref = v
+
+    def to_gps_data(self) -> Optional[GpsData]:
+        lat, lon, alt, lat_ref, lon_ref = self.lat, self.lon, self.alt, self.lat_ref, self.lon_ref
+        if lat is not None and lon is not None:
+            try:
+                lat_float = float(lat)
+                lon_float = float(lon)
+                
+                # Apply Refs if available and needed
+                if lat_ref and isinstance(lat_ref, str) and lat_ref.upper().startswith('S') and lat_float > 0:
+                    lat_float = -lat_float
+                
+                if lon_ref and isinstance(lon_ref, str) and lon_ref.upper().startswith('W') and lon_float > 0:
+                    lon_float = -lon_float
+
+                if not (lat_float == 0.0 and lon_float == 0.0):
+                    alt_float = None
+                    if alt is not None:
+                        try:
+                            alt_float = float(alt)
+                        except (ValueError, TypeError):
+                            pass
+                    
+                    return GpsData(
+                        latitude=lat_float,
+                        longitude=lon_float,
+                        altitude=alt_float
+                    )
+            except (ValueError, TypeError):
+                pass
+        return None
+
+@dataclass(slots=True)
 class MediaMetadata:
     timestamp: Optional[float] = None
     people: Optional[List[str]] = None
@@ -53,98 +157,107 @@ class MediaMetadata:
 
     @staticmethod
     def _extract_timestamp_from_json(data: Dict[str, Any]) -> Optional[int]:
-        if 'photoTakenTime' in data and 'timestamp' in data['photoTakenTime']:
-            return int(data['photoTakenTime']['timestamp'])
+        taken = data.get('photoTakenTime')
+        if taken is not None and 'timestamp' in taken:
+            return int(taken['timestamp'])
         return None
 
     @staticmethod
     def _extract_gps_from_json(data: Dict[str, Any]) -> Optional[GpsData]:
-        if 'geoData' in data:
-            geo = data['geoData']
-            if 'latitude' in geo and 'longitude' in geo and 'altitude' in geo:
-                lat = geo['latitude']
-                lon = geo['longitude']
-                # Google Photos often exports 0.0, 0.0 for missing location data
-                if not (lat == 0.0 and lon == 0.0):
-                    return GpsData(
-                        latitude=lat,
-                        longitude=lon,
-                        altitude=geo['altitude'] if geo['altitude'] != 0.0 else None
-                    )
+        geo = data.get('geoData')
+        if geo is not None and 'latitude' in geo and 'longitude' in geo and 'altitude' in geo:
+            lat = geo['latitude']
+            lon = geo['longitude']
+            # Google Photos often exports 0.0, 0.0 for missing location data
+            if not (lat == 0.0 and lon == 0.0):
+                altitude = geo['altitude']
+                return GpsData(
+                    latitude=lat,
+                    longitude=lon,
+                    altitude=altitude if altitude != 0.0 else None
+                )
         return None
 
     @staticmethod
     def _extract_url_from_json(data: Dict[str, Any]) -> Optional[str]:
-        if 'url' in data and data['url']:
-            return data['url']
-        return None
+        return data.get('url') or None
 
     @staticmethod
     def _extract_people_from_json(data: Dict[str, Any]) -> Optional[List[str]]:
-        if 'people' in data and isinstance(data['people'], list):
+        people = data.get('people')
+        if isinstance(people, list):
             people_names = []
-            for person in data['people']:
-                if 'name' in person and person['name']:
-                    people_names.append(person['name'])
+            for person in people:
+                name = person.get('name') if isinstance(person, dict) else None
+                if name:
+                    people_names.append(name)
             return people_names
         return None
 
     @classmethod
     def from_exif(cls, data: Dict[str, Any], media_type: MediaType) -> 'MediaMetadata':
-        """Parses raw ExifTool data into a MediaMetadata object."""
+        """Parses raw ExifTool data into a MediaMetadata object.
+        
+        Walks the tags once, dispatching on the tag name after the group prefix.
+        """
         metadata = cls()
         
-        ts = cls._parse_date_from_exif(data, media_type)
+        # Date candidates per priority: [first EXIF key, first XMP key, first key]
+        dates: List[Optional[List[Optional[str]]]] = [None] * len(EXIF_DATE_TAGS)
+        # Exact keys (e.g. 'XMP:Subject') and bare names (e.g. 'Subject') for people and URL tags
+        named: Dict[str, Any] = {}
+        gps = _ExifGps()
+        
+        for key, value in data.items():
+            tag = key[key.rfind(':') + 1:]
+            kind = EXIF_TAG_KINDS.get(tag)
+            if kind is None:
+                continue
+            if kind == _DATE:
+                priority = EXIF_DATE_PRIORITY[tag]
+                candidates = dates[priority]
+                if candidates is None:
+                    candidates = dates[priority] = [None, None, key]
+                if candidates[0] is None and 'EXIF' in key:
+                    candidates[0] = key
+                if candidates[1] is None and 'XMP' in key:
+                    candidates[1] = key
+            elif kind == _GPS:
+                gps.update(tag, value)
+            elif key == tag or key in EXIF_NAMED_TAGS:
+                named[key] = value
+        
+        found_date = None
+        for candidates in dates:
+            if candidates is not None:
+                exif_match, xmp_match, first_match = candidates
+                found_date = data[exif_match or xmp_match or first_match]
+                break
+        ts = cls._parse_date_from_exif(found_date, media_type)
         if ts is not None:
             metadata.timestamp = ts
 
-        gps = cls._parse_gps_from_exif(data)
-        if gps:
-            metadata.gps = gps
+        gps_data = gps.to_gps_data()
+        if gps_data:
+            metadata.gps = gps_data
                 
-        people = cls._parse_people_from_exif(data)
+        people = cls._parse_people_from_exif(named)
         if people:
             metadata.people = people
 
-        url = cls._parse_url_from_exif(data)
+        url = cls._parse_url_from_exif(named)
         if url:
             metadata.url = url
                 
         return metadata
 
     @staticmethod
-    def _parse_date_from_exif(data: Dict[str, Any], media_type: MediaType) -> Optional[float]:
-        # Simpler approach: Check the data dict for our preferred keys
-        found_date = None
-        
-        # Helper to find key in data
-        keys = data.keys()
-        
-        # Let's try to find the best date string
-        for priority_tag in ['DateTimeOriginal', 'CreateDate', 'ModifyDate', 'DateCreated']:
-            # Find keys that end with this tag
-            matches = [k for k in keys if k.endswith(priority_tag)]
-            
-            exif_match = next((k for k in matches if 'EXIF' in k), None)
-            if exif_match:
-                found_date = data[exif_match]
-                break
-            
-            # Prefer XMP for DateCreated
-            xmp_match = next((k for k in matches if 'XMP' in k), None)
-            if xmp_match:
-                found_date = data[xmp_match]
-                break
-            
-            if matches:
-                found_date = data[matches[0]]
-                break
-        
+    def _parse_date_from_exif(found_date: Any, media_type: MediaType) -> Optional[float]:
         if found_date:
             try:
                 # Take first 19 chars for standard format
                 clean_str = str(found_date)[:19]
-                dt = datetime.strptime(clean_str, "%Y:%m:%d %H:%M:%S")
+                dt = _parse_exif_datetime(clean_str)
                 
                 if media_type.supports_qt:
                     # Treat as UTC
@@ -159,100 +272,34 @@ class MediaMetadata:
         return None
 
     @staticmethod
-    def _parse_gps_from_exif(data: Dict[str, Any]) -> Optional[GpsData]:
-        # Extract GPS Data
-        lat = None
-        lon = None
-        alt = None
-        lat_ref = None
-        lon_ref = None
-        
-        for k, v in data.items():
-            if k.endswith('GPSLatitude'):
-                lat = v
-            elif k.endswith('GPSLongitude'):
-                lon = v
-            elif k.endswith('GPSAltitude'):
-                alt = v
-            elif k.endswith('GPSCoordinates'):
-                # QuickTime:GPSCoordinates format: "lat, lon, alt" or "lat, lon"
-                try:
-                    parts = [float(x.strip()) for x in v.split(',')]
-                    if len(parts) >= 2:
-                        lat = parts[0]
-                        lon = parts[1]
-                        if len(parts) >= 3:
-                            alt = parts[2]
-                except (ValueError, AttributeError):
-                    pass
-            elif k.endswith('GPSLatitudeRef'):
-                lat_ref = v
-            elif k.endswith('GPSLongitudeRef'):
-                lon_ref = v
-
-        if lat is not None and lon is not None:
-            try:
-                lat_float = float(lat)
-                lon_float = float(lon)
-                
-                # Apply Refs if available and needed
-                if lat_ref and isinstance(lat_ref, str) and lat_ref.upper().startswith('S') and lat_float > 0:
-                    lat_float = -lat_float
-                
-                if lon_ref and isinstance(lon_ref, str) and lon_ref.upper().startswith('W') and lon_float > 0:
-                    lon_float = -lon_float
-
-                if not (lat_float == 0.0 and lon_float == 0.0):
-                    alt_float = None
-                    if alt is not None:
-                        try:
-                            alt_float = float(alt)
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    return GpsData(
-                        latitude=lat_float,
-                        longitude=lon_float,
-                        altitude=alt_float
-                    )
-            except (ValueError, TypeError):
-                pass
-        return None
+    def _named_value(named: Dict[str, Any], tag: str) -> Any:
+        # Exact match first, then the bare tag name
+        if tag in named:
+            return named[tag]
+        return named.get(tag.split(':')[-1])
 
     @staticmethod
-    def _parse_people_from_exif(data: Dict[str, Any]) -> Optional[List[str]]:
-        # Extract People
-        people = []
-        for tag in ['XMP:Subject', 'XMP:PersonInImage', 'IPTC:Keywords']:
-            # Check for exact match or suffix match if needed, but we requested specific tags
-            val = None
-            if tag in data:
-                val = data[tag]
-            elif tag.split(':')[-1] in data:
-                 val = data[tag.split(':')[-1]]
-            
+    def _parse_people_from_exif(named: Dict[str, Any]) -> Optional[List[str]]:
+        # Extract People, deduplicating as we go. Names recur across the library, so they are
+        # interned; with -n a numeric keyword comes back as a number and is kept as text.
+        people = set()
+        for tag in EXIF_PEOPLE_TAGS:
+            val = MediaMetadata._named_value(named, tag)
             if val:
                 if isinstance(val, list):
-                    people.extend(val)
+                    people.update(intern(v if isinstance(v, str) else str(v)) for v in val)
                 elif isinstance(val, str):
-                    people.append(val)
+                    people.add(intern(val))
         
         if people:
-            # Deduplicate and sort
-            return sorted(list(set(people)))
+            return sorted(people)
         return None
 
     @staticmethod
-    def _parse_url_from_exif(data: Dict[str, Any]) -> Optional[str]:
+    def _parse_url_from_exif(named: Dict[str, Any]) -> Optional[str]:
         # Extract URL
-        for tag in ['XMP:UserComment', 'ExifIFD:UserComment']:
-             # Check for exact match or suffix match
-            val = None
-            if tag in data:
-                val = data[tag]
-            elif tag.split(':')[-1] in data:
-                 val = data[tag.split(':')[-1]]
-            
+        for tag in EXIF_URL_TAGS:
+            val = MediaMetadata._named_value(named, tag)
             if val and isinstance(val, str) and val.strip():
                 return val.strip()
         return None
@@ -277,16 +324,16 @@ class MediaMetadata:
 
     def _prepare_date_tags(self, media_type: MediaType, ts: float) -> Dict[str, str]:
         tags = {}
-        dt_local_str = datetime.fromtimestamp(ts).strftime("%Y:%m:%d %H:%M:%S")
-        dt_utc_str = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y:%m:%d %H:%M:%S")
-        
-        if media_type.supports_qt:
+        dt_local_str, dt_utc_str = _format_timestamp(ts)
+        supports_qt = media_type.supports_qt
+
+        if supports_qt:
             tags['QuickTime:CreateDate'] = dt_utc_str
             tags['QuickTime:ModifyDate'] = dt_utc_str
             tags['QuickTime:TrackCreateDate'] = dt_utc_str
             tags['QuickTime:MediaCreateDate'] = dt_utc_str
         if media_type.supports_xmp:
-            if media_type.supports_qt:
+            if supports_qt:
                 tags['XMP:DateCreated'] = dt_utc_str
             else:
                 tags['XMP:DateCreated'] = dt_local_str
@@ -367,8 +414,9 @@ class MediaMetadata:
         p2 = other.people
         if (p1 is None) != (p2 is None):
             return False
-        if p1 is not None and p2 is not None:
-            if sorted(p1) != sorted(p2):
+        if p1 is not None and p2 is not None and p1 != p2:
+            # Order doesn't matter; only sort when the cheap checks can't decide
+            if len(p1) != len(p2) or sorted(p1) != sorted(p2):
                 return False
 
         # Check URL
@@ -1,218 +1,493 @@
 import os
+import sys
 import logging
-import glob
 import re
+import bisect
+import collections
 import concurrent.futures
+import multiprocessing
 from pathlib import Path
-from typing import Optional, Tuple
-from datetime import datetime
+from typing import Iterator, Optional, Tuple
+from datetime import datetime, timezone
 from dataclasses import replace
 
-from .metadata_handler import MetadataHandler
+from .metadata_handler import MetadataHandler, parse_json_sidecar_file
 from .file_organizer import FileOrganizer
-from .media_type import get_media_type, MediaType
+from .media_type import get_media_type, media_type_for_extension, MediaType
 from .media_metadata import MediaMetadata
 from .persistence_manager import PersistenceManager, FileStatus, ProcessingPhase
 
 logger = logging.getLogger(__name__)
 
+# Sidecar chunks per JSON worker and batch: enough to balance uneven files, few enough
+# that each round trip to a worker process carries a useful amount of work
+JSON_CHUNKS_PER_WORKER = 4
+
+# Directory listings queued per scan thread ahead of the one being consumed
+SCAN_LISTINGS_PER_WORKER = 4
+
+# Entries stat-ed per task, so large albums are spread over the stat threads
+SCAN_STAT_CHUNK = 256
+
+def _init_worker_logging(level: int, fmt: Optional[str], datefmt: Optional[str], to_stdout: bool):
+    """Configures logging in a spawned worker process the way the parent's root logger is set up."""
+    kwargs = {'format': fmt} if fmt else {}
+    logging.basicConfig(
+        level=level,
+        datefmt=datefmt,
+        stream=sys.stdout if to_stdout else sys.stderr,
+        force=True,
+        **kwargs
+    )
+
+def _worker_logging_args() -> tuple:
+    """Returns the _init_worker_logging arguments matching this process's root logger."""
+    root = logging.getLogger()
+    handler = next((h for h in root.handlers if isinstance(h, logging.StreamHandler)), None)
+    formatter = handler.formatter if handler else None
+    return (
+        root.getEffectiveLevel(),
+        formatter._fmt if formatter else None,
+        formatter.datefmt if formatter else None,
+        handler is not None and handler.stream is sys.stdout,
+    )
+
 class MediaProcessor:
     """Main processor class with phased execution and persistence."""
     
     JSON = '.json'
+    DUPLICATE_SUFFIX_RE = re.compile(r'(\(\d+\))$')
+    EDITED_SUFFIX = '-edited'
+    # Bounds of the local timestamps accepted from metadata; earlier dates are camera defaults
+    MIN_VALID_TIMESTAMP = datetime(1999, 1, 1).timestamp()
+    # End of year 9999 in UTC. A naive year-9999 datetime can't be converted on every platform
+    # (Windows' localtime stops at year 3000), so the local end of the year is checked per call.
+    MAX_VALID_TIMESTAMP = datetime(9999, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp() + 1
+    # Larger than any UTC offset
+    UTC_OFFSET_MARGIN = 86400
 
-    def __init__(self, source_dir: Path, dest_dir: Path, persistence_manager: PersistenceManager, dry_run: bool = False, max_workers: int = 4, batch_size: int = 1000):
+    def __init__(self, source_dir: Path, dest_dir: Path, persistence_manager: PersistenceManager, dry_run: bool = False, max_workers: int = 4, batch_size: int = 1000, reflink: bool = False, dedup: bool = False, scan_workers: Optional[int] = None):
         self.source_dir = source_dir
         self.dest_dir = dest_dir
         self.persistence = persistence_manager
         self.dry_run = dry_run
         self.max_workers = max_workers
+        # stat() is latency-bound, so discovery keeps more calls in flight than there are workers
+        self.scan_workers = scan_workers or max_workers * 4
         self.batch_size = batch_size
-        self.metadata_handler = MetadataHandler()
-        self.file_organizer = FileOrganizer(dest_dir, dry_run)
+        self.dedup = dedup
+        self.metadata_handler = MetadataHandler(pool_size=max_workers)
+        self.file_organizer = FileOrganizer(dest_dir, dry_run, reflink)
+        # Directory path -> names of the JSON files in it, filled in while scanning
+        self._json_index: dict[str, set[str]] = {}
+        # Directory path -> the same names sorted, built on first prefix lookup
+        self._json_sorted: dict[str, list[str]] = {}
 
     def process(self):
         """Orchestrates the phased processing pipeline."""
         self.persistence.initialize()
         
-        # Phase 1: Discovery
-        self._phase_discovery()
-        
-        # Phase 2: Metadata Extraction (Analysis)
-        self._phase_metadata_extraction()
-        
-        # Phase 3: Resolution (Target & Merge)
-        self._phase_resolution()
-        
-        # Phase 4: Execution (Copy & Write)
-        self._phase_execution()
-        
-        logger.info("Processing complete.")
-        self.persistence.close()
+        try:
+            # Phase 1: Discovery
+            self._phase_discovery()
+            
+            # Phase 1b: Skip byte-identical copies (optional)
+            if self.dedup:
+                self._phase_deduplication()
+            
+            # Phase 2: Metadata Extraction (Analysis)
+            self._phase_metadata_extraction()
+            
+            # Phase 3: Resolution (Target & Merge)
+            self._phase_resolution()
+            
+            # Phase 4: Execution (Copy & Write)
+            self._phase_execution()
+            
+            logger.info("Processing complete.")
+        finally:
+            # The ExifTool processes serve every phase; shut them down once at the end.
+            self.metadata_handler.close()
+            self.persistence.close()
 
     def _phase_discovery(self):
         """Phase 1: Scan source directory and populate DB."""
         logger.info("Phase 1: Discovery - Scanning files...")
         count = 0
-        for root, _, files in os.walk(self.source_dir):
-            for file in files:
-                file_path = Path(root) / file
-                media_type = get_media_type(file_path)
+        # Inserted batch_size rows per transaction
+        pending = []
+        for entry in self._scan_files(self.source_dir):
+            # Work on the plain name; a Path is only built for files we keep
+            name = entry.name
+            dot = name.rfind('.')
+            if dot <= 0:
+                continue
+            media_type = media_type_for_extension(name[dot:])
+            
+            if self._should_process(name[:dot], media_type):
+                file_path = Path(entry.path)
+                try:
+                    # The scan's stat threads already stat-ed the entry; DirEntry keeps the result
+                    stat = entry.stat()
+                    pending.append((file_path, media_type, stat.st_size, stat.st_mtime))
+                    count += 1
+                except Exception as e:
+                    logger.error(f"Error adding file {file_path}: {e}")
+                if len(pending) >= self.batch_size:
+                    self.persistence.add_files(pending)
+                    pending = []
+        if pending:
+            self.persistence.add_files(pending)
+
+        logger.info(f"Discovery complete. Found {count} supported files.")
+
+    def _phase_deduplication(self):
+        """Marks NEW files whose content duplicates an earlier NEW file as SKIPPED.
+        
+        Files are grouped by size first, so only files sharing a size are ever hashed.
+        """
+        logger.info("Phase 1b: Deduplication...")
+        skipped = 0
+        originals: dict[str, str] = {}
+        current_size = None
+        candidates = self.persistence.get_files_with_shared_size(FileStatus.NEW)
+        # Hash in parallel (hashlib releases the GIL); map keeps the size-grouped order
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            digests = list(executor.map(self._hash_file_record, candidates))
+        
+        with self.persistence.batch():
+            for file_record, digest in zip(candidates, digests):
+                if digest is None:
+                    continue
+                if file_record['file_size'] != current_size:
+                    current_size = file_record['file_size']
+                    originals = {}
                 
-                if self._should_process(file_path, media_type):
-                    try:
-                        stat = file_path.stat()
-                        self.persistence.add_file(file_path, media_type, stat.st_size, stat.st_mtime)
-                        count += 1
-                    except Exception as e:
-                        logger.error(f"Error adding file {file_path}: {e}")
+                source_path = file_record['source_path']
+                original = originals.setdefault(digest, source_path)
+                if original != source_path:
+                    logger.info(f"Skipping duplicate {source_path} (same content as {original})")
+                    self.persistence.update_status(file_record['id'], FileStatus.SKIPPED, ProcessingPhase.DISCOVERY, f"Duplicate of {original}")
+                    skipped += 1
         
-        logger.info(f"Discovery complete. Found {count} supported files.")
+        logger.info(f"Deduplication complete. Skipped {skipped} duplicate files.")
+
+    def _hash_file_record(self, file_record: dict) -> Optional[str]:
+        source_path = file_record['source_path']
+        try:
+            return self.file_organizer.file_digest(Path(source_path), file_record['file_size'], file_record['mtime'])
+        except OSError as e:
+            logger.error(f"Error hashing {source_path}: {e}")
+            return None
+
+    def _scan_files(self, root: Path) -> Iterator[os.DirEntry]:
+        """Yields the non-JSON file entries below root, without following directory symlinks.
+        
+        Directories are listed by a thread pool, several at a time, and their entries are
+        stat-ed in chunks by a second, larger pool. Entries are still yielded one whole
+        directory at a time in a fixed breadth-first order. JSON file names are recorded per
+        directory in the sidecar index as a side effect.
+        """
+        queued = collections.deque([root])
+        listings = collections.deque()
+        # The stat pool is shut down last, after the listing threads that submit to it
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.scan_workers) as stat_executor, \
+             concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as list_executor:
+            while queued or listings:
+                # Keep a bounded number of listings in flight so memory doesn't grow with the tree
+                while queued and len(listings) < self.max_workers * SCAN_LISTINGS_PER_WORKER:
+                    directory = queued.popleft()
+                    listings.append((directory, list_executor.submit(self._list_directory, directory, stat_executor)))
+                directory, listing = listings.popleft()
+                subdirectories, json_names, entries, stats = listing.result()
+                self._json_index[str(Path(directory))] = json_names
+                queued.extend(subdirectories)
+                concurrent.futures.wait(stats)
+                yield from entries
+
+    def _list_directory(self, directory: str | Path, stat_executor: concurrent.futures.Executor) -> Tuple[list[str], set[str], list[os.DirEntry], list[concurrent.futures.Future]]:
+        """Lists one directory: its subdirectories, its JSON names, its other file entries and
+        the pending stat tasks for those entries."""
+        subdirectories = []
+        json_names = set()
+        entries = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirectories.append(entry.path)
+                    elif entry.name.endswith(self.JSON):
+                        json_names.add(entry.name)
+                    else:
+                        entries.append(entry)
+        except OSError as e:
+            logger.error(f"Error scanning directory {directory}: {e}")
+        stats = [
+            stat_executor.submit(self._stat_entries, entries[i:i + SCAN_STAT_CHUNK])
+            for i in range(0, len(entries), SCAN_STAT_CHUNK)
+        ]
+        return subdirectories, json_names, entries, stats
+
+    @staticmethod
+    def _stat_entries(entries: list[os.DirEntry]):
+        """Stats entries so DirEntry caches the results for discovery."""
+        for entry in entries:
+            try:
+                entry.stat()
+            except OSError:
+                # Reported when discovery stats the entry again
+                pass
 
     def _phase_metadata_extraction(self):
         """Phase 2: Read metadata from JSON and Media files."""
         logger.info("Phase 2: Metadata Extraction...")
         
+        if self.max_workers == 1:
+            # A single worker process adds no parallelism, only spawn and pickling costs;
+            # a thread still overlaps the parsing with ExifTool's reads
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as json_executor:
+                self._metadata_extraction_batches(json_executor)
+            return
+        
+        with self._json_process_pool() as json_executor:
+            self._metadata_extraction_batches(json_executor)
+
+    def _json_process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Returns the worker process pool for JSON parsing.
+        
+        JSON parsing is pure Python and GIL-bound, so it runs in worker processes.
+        Workers are only started once the first sidecar is submitted.
+        """
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            # Don't fork a process that holds ExifTool pipes and worker threads
+            mp_context=multiprocessing.get_context('spawn'),
+            # Spawned workers start with unconfigured logging; give them the parent's level and format
+            initializer=_init_worker_logging,
+            initargs=_worker_logging_args()
+        )
+
+    def _metadata_extraction_batches(self, json_executor: concurrent.futures.Executor):
         # Get files that need metadata reading (NEW)
         # We process in chunks
-        while True:
-            files = self.persistence.get_files_by_status([FileStatus.NEW], limit=self.batch_size)
-            if not files:
-                break
-            
+        # Sidecars parsed for the previous batch: a directory split between two batches
+        # shares them with the next one
+        previous_sidecars: dict[Path, MediaMetadata] = {}
+        for files in self.persistence.iter_files_by_status([FileStatus.NEW], self.batch_size):
             logger.info(f"Processing batch of {len(files)} files for metadata extraction...")
             
-            # 1. Parse JSON Sidecars (Parallel)
-            # We can do this in parallel or just sequentially since it's fast. Let's do parallel.
-            # Actually, let's stick to the previous logic: find JSON, parse it.
-            
             # We need to map file_id -> path for the batch
             file_map = {f['id']: Path(f['source_path']) for f in files}
             
-            # Batch Read Media Metadata
+            # 1. Find JSON Sidecars (index lookups) and start parsing them in the worker processes
+            sidecars = {}
+            for file_id, file_path in file_map.items():
+                json_path = self._find_json_sidecar(file_path)
+                if json_path:
+                    sidecars[file_id] = json_path
+            # Edited copies and numbered duplicates share a sidecar; parse each one once
+            unique_sidecars = [p for p in dict.fromkeys(sidecars.values()) if p not in previous_sidecars]
+            chunksize = max(1, len(unique_sidecars) // (self.max_workers * JSON_CHUNKS_PER_WORKER))
+            json_results = json_executor.map(parse_json_sidecar_file, unique_sidecars, chunksize=chunksize)
+            
+            # 2. Batch Read Media Metadata while the JSON is being parsed
             paths = list(file_map.values())
             media_metadata_map = self.metadata_handler.read_metadata_batch([(p, get_media_type(p)) for p in paths])
+            parsed_sidecars = dict(zip(unique_sidecars, json_results))
+            for json_path in sidecars.values():
+                if json_path not in parsed_sidecars:
+                    parsed_sidecars[json_path] = previous_sidecars[json_path]
+            previous_sidecars = parsed_sidecars
+            json_metadata_map = {file_id: parsed_sidecars[json_path] for file_id, json_path in sidecars.items()}
             
-            for file_record in files:
-                file_id = file_record['id']
-                file_path = file_map[file_id]
-                
-                try:
-                    # Save Media Metadata
-                    if file_path in media_metadata_map:
-                        self.persistence.save_metadata(file_id, 'MEDIA', media_metadata_map[file_path])
-                    
-                    # Find and Parse JSON
-                    json_path = self._find_json_sidecar(file_path)
-                    if json_path:
-                        json_metadata = self.metadata_handler.parse_json_sidecar(json_path)
-                        self.persistence.save_metadata(file_id, 'JSON', json_metadata)
-                    
-                    self.persistence.update_status(file_id, FileStatus.METADATA_READ, ProcessingPhase.METADATA_READ)
+            # One transaction per batch rather than one commit per save
+            with self.persistence.batch():
+                for file_record in files:
+                    file_id = file_record['id']
+                    file_path = file_map[file_id]
                     
-                except Exception as e:
-                    logger.error(f"Error extracting metadata for {file_path}: {e}")
-                    self.persistence.update_status(file_id, FileStatus.FAILED, ProcessingPhase.METADATA_READ, str(e))
+                    try:
+                        # Save Media Metadata
+                        if file_path in media_metadata_map:
+                            self.persistence.save_metadata(file_id, 'MEDIA', media_metadata_map[file_path])
+                        
+                        # Save JSON Metadata
+                        json_metadata = json_metadata_map.get(file_id)
+                        if json_metadata:
+                            self.persistence.save_metadata(file_id, 'JSON', json_metadata)
+                        
+                        self.persistence.update_status(file_id, FileStatus.METADATA_READ, ProcessingPhase.METADATA_READ)
+                        
+                    except Exception as e:
+                        logger.error(f"Error extracting metadata for {file_path}: {e}")
+                        self.persistence.update_status(file_id, FileStatus.FAILED, ProcessingPhase.METADATA_READ, str(e))
 
     def _phase_resolution(self):
         """Phase 3: Merge metadata and resolve target paths."""
         logger.info("Phase 3: Resolution...")
         
-        while True:
-            files = self.persistence.get_files_by_status([FileStatus.METADATA_READ], limit=self.batch_size)
-            if not files:
-                break
-            
+        for files in self.persistence.iter_files_by_status([FileStatus.METADATA_READ], self.batch_size):
             logger.info(f"Resolving batch of {len(files)} files...")
             
-            for file_record in files:
-                file_id = file_record['id']
-                file_path = Path(file_record['source_path'])
-                media_type = get_media_type(file_path) # Re-derive or use stored string
-                
-                try:
-                    media_metadata = self.persistence.get_metadata(file_id, 'MEDIA') or MediaMetadata()
-                    json_metadata = self.persistence.get_metadata(file_id, 'JSON') or MediaMetadata()
-                    
-                    # Merge Logic
-                    merged_metadata = self._merge_metadata(file_path, media_type, media_metadata, json_metadata)
-                    self.persistence.save_metadata(file_id, 'MERGED', merged_metadata)
-                    
-                    # Determine Timestamp for Path
-                    timestamp = merged_metadata.timestamp
-                    
-                    # Resolve Target Path
-                    target_path = self.file_organizer.get_target_path(timestamp, file_path.name)
-                    
-                    # Collision Handling (Preliminary)
-                    final_path = self.file_organizer.resolve_collision(target_path)
-                    
-                    self.persistence.update_target_path(file_id, final_path)
-                    self.persistence.update_status(file_id, FileStatus.TARGET_RESOLVED, ProcessingPhase.RESOLUTION)
+            # Nothing is written to the destination during this phase, so list each target
+            # directory once per batch instead of stat-ing every candidate path
+            dest_listings: dict[Path, set[str]] = {}
+            
+            # Load the batch's metadata with one query per source instead of two per file
+            file_ids = [f['id'] for f in files]
+            media_metadata_map = self.persistence.get_metadata_for_files(file_ids, 'MEDIA')
+            json_metadata_map = self.persistence.get_metadata_for_files(file_ids, 'JSON')
+            
+            # One transaction per batch rather than one commit per save
+            with self.persistence.batch():
+                for file_record in files:
+                    file_id = file_record['id']
+                    file_path = Path(file_record['source_path'])
+                    media_type = get_media_type(file_path) # Re-derive or use stored string
                     
-                except Exception as e:
-                    logger.error(f"Error resolving {file_path}: {e}")
-                    self.persistence.update_status(file_id, FileStatus.FAILED, ProcessingPhase.RESOLUTION, str(e))
+                    try:
+                        media_metadata = media_metadata_map.get(file_id) or MediaMetadata()
+                        json_metadata = json_metadata_map.get(file_id) or MediaMetadata()
+                        
+                        # Merge Logic
+                        merged_metadata = self._merge_metadata(file_path, media_type, media_metadata, json_metadata, file_record['mtime'])
+                        self.persistence.save_metadata(file_id, 'MERGED', merged_metadata)
+                        
+                        # Determine Timestamp for Path
+                        timestamp = merged_metadata.timestamp
+                        
+                        # Resolve Target Path
+                        target_path = self.file_organizer.get_target_path(timestamp, file_path.name)
+                        
+                        # Collision Handling (Preliminary)
+                        existing_names = dest_listings.get(target_path.parent)
+                        if existing_names is None:
+                            existing_names = self.file_organizer.list_names(target_path.parent)
+                            dest_listings[target_path.parent] = existing_names
+                        final_path = self.file_organizer.resolve_collision(target_path, existing_names)
+                        
+                        self.persistence.update_target_path(file_id, final_path)
+                        self.persistence.update_status(file_id, FileStatus.TARGET_RESOLVED, ProcessingPhase.RESOLUTION)
+                        
+                    except Exception as e:
+                        logger.error(f"Error resolving {file_path}: {e}")
+                        self.persistence.update_status(file_id, FileStatus.FAILED, ProcessingPhase.RESOLUTION, str(e))
 
     def _phase_execution(self):
-        """Phase 4: Copy files and write metadata."""
+        """Phase 4: Copy files and write metadata.
+        
+        Each batch's metadata write runs in the background while the next batch is copied.
+        Copied files wait as IN_PROGRESS until their write has finished.
+        """
         logger.info("Phase 4: Execution...")
         
-        while True:
-            files = self.persistence.get_files_by_status([FileStatus.TARGET_RESOLVED], limit=self.batch_size)
-            if not files:
-                break
-            
-            logger.info(f"Executing batch of {len(files)} files...")
-            
-            write_ops = []
-            
-            # Copy Files (Parallel)
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = {
-                    executor.submit(self._execute_single_file, file_record): file_record
-                    for file_record in files
-                }
+        # Files a previous run copied but never finished writing are simply redone
+        for in_progress in self.persistence.iter_files_by_status([FileStatus.IN_PROGRESS], self.batch_size):
+            self.persistence.update_statuses([f['id'] for f in in_progress], FileStatus.TARGET_RESOLVED, ProcessingPhase.RESOLUTION)
+        
+        # One copy pool serves every batch instead of starting max_workers threads per batch
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as copy_executor, \
+             concurrent.futures.ThreadPoolExecutor(max_workers=1) as write_executor:
+            pending_write = None
+            for files in self.persistence.iter_files_by_status([FileStatus.TARGET_RESOLVED], self.batch_size):
+                logger.info(f"Executing batch of {len(files)} files...")
                 
-                for future in concurrent.futures.as_completed(futures):
-                    file_record = futures[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            write_ops.append(result)
-                    except Exception as e:
-                        logger.error(f"Error executing {file_record['source_path']}: {e}")
-                        self.persistence.update_status(file_record['id'], FileStatus.FAILED, ProcessingPhase.EXECUTION, str(e))
-
-            # Batch Write Metadata
-            if write_ops:
-                logger.info(f"Batch writing metadata to {len(write_ops)} files...")
-                self.metadata_handler.write_metadata_batch(write_ops, self.dry_run)
+                # Album copies of a file resolve to the same target; never copy over a file
+                # whose metadata is still being written
+                if pending_write and any(f['target_path'] in pending_write[2] for f in files):
+                    self._finish_write(pending_write)
+                    pending_write = None
                 
-                # Update status to SUCCESS for these files
-                for dest_path, _, _ in write_ops:
-                    # We need to map back to file_id. 
-                    # This is a bit inefficient. Ideally write_metadata_batch returns success/fail per file.
-                    # For now, assume success if no exception raised in batch write (which logs errors but continues).
-                    # We need to find which file_id corresponds to dest_path.
-                    # Let's iterate files again? Or return file_id in write_ops?
-                    # write_metadata_batch expects (path, type, metadata).
-                    # We can't easily change it without changing MetadataHandler.
-                    
-                    # Let's just update all successful copies to SUCCESS.
-                    # If write fails, it logs.
-                    pass
+                write_ops, failed_ids = self._copy_batch(files, copy_executor)
+                
+                # Park the copied files so the next query skips them while their write runs
+                copied_ids = [f['id'] for f in files if f['id'] not in failed_ids]
+                self.persistence.update_statuses(copied_ids, FileStatus.IN_PROGRESS, ProcessingPhase.EXECUTION)
+                
+                # ExifTool only allows one write per file at a time, so batches are written in order
+                if pending_write:
+                    self._finish_write(pending_write)
+                future = None
+                if write_ops:
+                    logger.info(f"Batch writing metadata to {len(write_ops)} files...")
+                    future = write_executor.submit(self.metadata_handler.write_metadata_batch, write_ops, self.dry_run)
+                pending_write = (future, copied_ids, {str(dest_path) for dest_path, _, _ in write_ops})
             
-            # Update status for all processed files in this batch
-            # This is a simplification. Ideally we track write success.
-            for file_record in files:
-                # If it wasn't failed during copy
-                current_status = self.persistence.get_file_by_id(file_record['id'])['status']
-                if current_status == FileStatus.TARGET_RESOLVED.value:
-                     self.persistence.update_status(file_record['id'], FileStatus.SUCCESS, ProcessingPhase.EXECUTION)
-
-    def _execute_single_file(self, file_record: dict) -> Optional[Tuple[Path, MediaType, MediaMetadata]]:
-        """Copies a single file and prepares metadata write op."""
+            if pending_write:
+                self._finish_write(pending_write)
+
+    def _copy_batch(self, files: list[dict], executor: concurrent.futures.Executor) -> Tuple[list[Tuple[Path, MediaType, MediaMetadata]], set[int]]:
+        """Copies a batch of files in parallel on executor.
+        
+        Returns the metadata writes the copies need and the ids of the files that failed.
+        """
+        write_ops = []
+        failed_ids = set()
+        
+        existing_metadata = self._read_existing_targets([Path(f['target_path']) for f in files])
+        
+        # Copy Files (Parallel)
+        futures = {
+            executor.submit(self._execute_single_file, file_record, existing_metadata): file_record
+            for file_record in files
+        }
+        
+        for future in concurrent.futures.as_completed(futures):
+            file_record = futures[future]
+            try:
+                result = future.result()
+                if result:
+                    write_ops.append(result)
+            except Exception as e:
+                logger.error(f"Error executing {file_record['source_path']}: {e}")
+                self.persistence.update_status(file_record['id'], FileStatus.FAILED, ProcessingPhase.EXECUTION, str(e))
+                failed_ids.add(file_record['id'])
+        return write_ops, failed_ids
+
+    def _read_existing_targets(self, target_paths: list[Path]) -> dict[Path, MediaMetadata]:
+        """Returns the metadata of the targets that already exist.
+        
+        Targets unchanged since an earlier read are served from the database; the rest are
+        read in one ExifTool round trip rather than one per file from the copy threads.
+        """
+        existing_metadata = {}
+        to_read = []
+        with self.persistence.batch():
+            for target_path in dict.fromkeys(target_paths):
+                try:
+                    stat = target_path.stat()
+                except OSError:
+                    continue
+                cached = self.persistence.get_dest_fingerprint(target_path)
+                if cached and cached['file_size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+                    existing_metadata[target_path] = cached['metadata']
+                else:
+                    to_read.append((target_path, stat))
+            
+            read_metadata = self.metadata_handler.read_metadata_batch(
+                [(p, get_media_type(p)) for p, _ in to_read]
+            )
+            for target_path, stat in to_read:
+                metadata = read_metadata.get(target_path)
+                if metadata is not None:
+                    existing_metadata[target_path] = metadata
+                    self.persistence.save_dest_fingerprint(target_path, stat.st_size, stat.st_mtime, metadata)
+        return existing_metadata
+
+    def _finish_write(self, pending_write: tuple):
+        """Waits for a batch's metadata write and marks its copied files as done."""
+        future, copied_ids, _ = pending_write
+        if future:
+            # write_metadata_batch logs per-file ExifTool errors itself; success isn't tracked per file
+            future.result()
+        self.persistence.update_statuses(copied_ids, FileStatus.SUCCESS, ProcessingPhase.EXECUTION)
+
+    def _execute_single_file(self, file_record: dict, existing_metadata: Optional[dict[Path, MediaMetadata]] = None) -> Optional[Tuple[Path, MediaType, MediaMetadata]]:
+        """Copies a single file and prepares metadata write op.
+        
+        existing_metadata holds pre-read metadata of existing targets; others are read on demand.
+        """
         file_id = file_record['id']
         source_path = Path(file_record['source_path'])
         target_path = Path(file_record['target_path'])
@@ -222,18 +497,26 @@ class MediaProcessor:
         
         # Check for identical file (Duplicate Skip)
         if target_path.exists():
-            # 1. Check basic file attributes (Size/Mtime) via FileOrganizer
-            
-            # 2. Check Metadata Identity
+            # 1. Check Metadata Identity
             # If we are about to write metadata, we should check if the existing file already has it.
-            existing_metadata = self.metadata_handler.extract_metadata(target_path)
+            target_metadata = (existing_metadata or {}).get(target_path)
+            if target_metadata is None:
+                target_metadata = self.metadata_handler.extract_metadata(target_path)
             
-            if merged_metadata and merged_metadata.is_identical(existing_metadata):
+            if merged_metadata and merged_metadata.is_identical(target_metadata):
                 logger.info(f"Skipping identical file based on metadata: {source_path.name}")
                 return None
+            
+            # 2. Check Content Identity: a plain copy whose metadata was never written (e.g. the
+            # run was interrupted) only needs the write. Different sizes rule this out unhashed.
+            if self.file_organizer.has_same_content(source_path, file_record['file_size'], file_record['mtime'], target_path):
+                logger.info(f"Target already holds a copy of {source_path.name}; not copying again")
+                if merged_metadata and media_type.supports_write():
+                    return (target_path, media_type, merged_metadata)
+                return None
 
         timestamp = (merged_metadata.timestamp if merged_metadata and merged_metadata.timestamp 
-                     else source_path.stat().st_mtime)
+                     else file_record['mtime'])
         
         self.file_organizer.copy_file(source_path, target_path, timestamp)
         
@@ -242,19 +525,19 @@ class MediaProcessor:
         
         return None
 
-    def _merge_metadata(self, file_path: Path, media_type: MediaType, media_metadata: MediaMetadata, json_metadata: MediaMetadata) -> MediaMetadata:
+    def _merge_metadata(self, file_path: Path, media_type: MediaType, media_metadata: MediaMetadata, json_metadata: MediaMetadata, mtime: Optional[float] = None) -> MediaMetadata:
         """Merges metadata according to priority rules."""
         # JSON people overwrites media people if it's not None (even if empty list)
         people = json_metadata.people if json_metadata.people is not None else media_metadata.people
 
         return MediaMetadata(
-            timestamp = self._determine_timestamp(file_path, media_metadata, json_metadata),
+            timestamp = self._determine_timestamp(file_path, media_metadata, json_metadata, mtime),
             gps = media_metadata.gps or json_metadata.gps,
             people = people,
             url = media_metadata.url or json_metadata.url
         )
 
-    def _determine_timestamp(self, file_path: Path, media_metadata: MediaMetadata, json_metadata: MediaMetadata) -> float:
+    def _determine_timestamp(self, file_path: Path, media_metadata: MediaMetadata, json_metadata: MediaMetadata, mtime: Optional[float] = None) -> float:
         """Determines the best timestamp for the file."""
         # Priority 1: Media
         if self._is_valid_timestamp(media_metadata.timestamp):
@@ -264,52 +547,85 @@ class MediaProcessor:
         if self._is_valid_timestamp(json_metadata.timestamp):
             return json_metadata.timestamp
             
-        # Fallback: Mtime
+        # Fallback: Mtime (recorded at discovery, so no need to stat again)
+        if mtime is not None:
+            return mtime
         return file_path.stat().st_mtime
 
+    def _json_names(self, directory: Path) -> set[str]:
+        """Returns the names of the JSON files in directory, listing it on first use."""
+        key = str(directory)
+        json_names = self._json_index.get(key)
+        if json_names is None:
+            try:
+                with os.scandir(directory) as it:
+                    json_names = {entry.name for entry in it if entry.name.endswith(self.JSON)}
+            except OSError:
+                json_names = set()
+            self._json_index[key] = json_names
+        return json_names
+
+    def _sorted_json_names(self, directory: Path) -> list[str]:
+        key = str(directory)
+        sorted_names = self._json_sorted.get(key)
+        if sorted_names is None:
+            sorted_names = sorted(self._json_names(directory))
+            self._json_sorted[key] = sorted_names
+        return sorted_names
+
     def _find_json_sidecar(self, media_path: Path) -> Optional[Path]:
-        """Same as before..."""
-        stems_to_check = [media_path.stem]
-        if media_path.stem.endswith("-edited"):
-            stems_to_check.append(media_path.stem[:-7])
-
-        candidates = []
-        for stem in stems_to_check:
-            escaped_stem = glob.escape(stem)
-            candidates.extend(list(media_path.parent.glob(f"{escaped_stem}.*json")))
-
-        if len(candidates) > 1:
-            def score_candidate(path: Path):
-                name = path.name
-                if name == media_path.name + self.JSON: return 0
-                if name == media_path.stem + self.JSON: return 1
-                if name.startswith(media_path.name + "."): return 2
-                return 3
-            candidates.sort(key=score_candidate)
-        
-        match = re.search(r'(\(\d+\))$', media_path.stem)
+        """Finds the JSON sidecar for a media file using its directory's JSON name index."""
+        parent = media_path.parent
+        json_names = self._json_names(parent)
+        if not json_names:
+            return None
+        for candidate in self._sidecar_candidates(parent, media_path):
+            if candidate in json_names:
+                return parent / candidate
+        return None
+
+    def _sidecar_candidates(self, parent: Path, media_path: Path) -> Iterator[str]:
+        """Yields sidecar names in order of preference, so the caller can stop at the first hit."""
+        # Exact matches are the common case and need no search of the directory's JSON names.
+        # The name parts are only split out once the first guess has missed.
+        name = media_path.name
+        yield name + self.JSON
+        stem = media_path.stem
+        yield stem + self.JSON
+
+        # Otherwise anything equivalent to globbing "{stem}.*json", preferring "{name}.*"
+        # (e.g. image.jpg.supplemental-metadata.json), then the stem without "-edited".
+        # The first sorted name with a prefix is found by bisection instead of a scan.
+        sorted_names = self._sorted_json_names(parent)
+        stems_to_check = [name, stem]
+        if stem.endswith(self.EDITED_SUFFIX):
+            stems_to_check.append(stem[:-len(self.EDITED_SUFFIX)])
+        for prefix_stem in stems_to_check:
+            prefix = prefix_stem + "."
+            i = bisect.bisect_left(sorted_names, prefix)
+            if i < len(sorted_names) and sorted_names[i].startswith(prefix):
+                yield sorted_names[i]
+
+        # Duplicates: image(1).jpg -> image.jpg(1).json
+        # The regex only runs for stems that can match at all
+        match = self.DUPLICATE_SUFFIX_RE.search(stem) if stem.endswith(')') else None
         if match:
             duplicate_suffix = match.group(1)
-            base_stem = media_path.stem[:-len(duplicate_suffix)]
-            potential_name = f"{base_stem}{media_path.suffix}{duplicate_suffix}{self.JSON}"
-            candidates.append(media_path.with_name(potential_name))
-            legacy_duplicate = media_path.with_name(media_path.stem + self.JSON)
-            if legacy_duplicate not in candidates:
-                candidates.append(legacy_duplicate)
-
-        for candidate in candidates:
-            if candidate.exists():
-                return candidate
-        return None
+            yield f"{stem[:-len(duplicate_suffix)]}{media_path.suffix}{duplicate_suffix}{self.JSON}"
 
-    def _should_process(self, file_path: Path, media_type: MediaType) -> bool:
-        return (not file_path.stem.endswith("-edited")) and (media_type.recognized)
+    def _should_process(self, stem: str, media_type: MediaType) -> bool:
+        return (not stem.endswith(self.EDITED_SUFFIX)) and (media_type.recognized)
     
     def _is_valid_timestamp(self, timestamp: float) -> bool:
-        if timestamp is None:
+        # A plain range check: local years 1999 through 9999, the last one datetime can represent
+        if not (isinstance(timestamp, (int, float))
+                and self.MIN_VALID_TIMESTAMP <= timestamp < self.MAX_VALID_TIMESTAMP + self.UTC_OFFSET_MARGIN):
             return False
+        if timestamp < self.MAX_VALID_TIMESTAMP - self.UTC_OFFSET_MARGIN:
+            return True
+        # Within a day of the end of year 9999 the local offset decides
         try:
-            dt = datetime.fromtimestamp(timestamp)
-            return dt.year >= 1999
+            datetime.fromtimestamp(timestamp)
+            return True
         except (ValueError, OSError, OverflowError):
             return False
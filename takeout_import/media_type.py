@@ -2,7 +2,7 @@ from pathlib import Path
 
 class MediaType:
 
-    def __init__(self, type: str, extensions: set[str], supports_exif: bool = False, supports_iptc: bool = False, supports_xmp: bool = False, supports_qt: bool = False, recognized: bool = True):
+    def __init__(self, type: str, extensions: set[str], supports_exif: bool = False, supports_iptc: bool = False, supports_xmp: bool = False, supports_qt: bool = False, recognized: bool = True, supports_read: bool = True):
         self.type = type
         self.extensions = extensions
         self.supports_exif = supports_exif
@@ -10,6 +10,9 @@ class MediaType:
         self.supports_xmp = supports_xmp
         self.supports_qt = supports_qt
         self.recognized = recognized
+        # Whether the format can carry any of the tags we read; RIFF and Matroska videos can
+        # hold dates even though we never write to them
+        self.supports_read = supports_read
 
     def supports_write(self) -> bool:
         return self.supports_exif or self.supports_iptc or self.supports_xmp or self.supports_qt
@@ -45,7 +48,8 @@ for media_type in [
     ),
     MediaType(
         "IMAGE",
-        {'.bmp'}
+        {'.bmp'},
+        supports_read=False
     ),
     MediaType(
         "VIDEO",
@@ -55,8 +59,20 @@ for media_type in [
     for ext in media_type.extensions:
         SUPPORTED_MEDIA[ext] = media_type
 
-def get_media_type(file_path: Path) -> MediaType:
-    media_type: MediaType = SUPPORTED_MEDIA.get(file_path.suffix.lower())
+# Lower, upper and capitalized spellings of every extension, so most lookups need no lower()
+_MEDIA_BY_SPELLING: dict[str, MediaType] = {
+    spelling: media_type
+    for ext, media_type in SUPPORTED_MEDIA.items()
+    for spelling in (ext, ext.upper(), '.' + ext[1:].capitalize())
+}
+
+def media_type_for_extension(ext: str) -> MediaType:
+    """Returns the media type for an extension including the dot, ignoring case."""
+    media_type = _MEDIA_BY_SPELLING.get(ext)
     if media_type is None:
-        return UNKNOWN
-    return media_type
\ No newline at end of file
+        # Unusual mixed case, or not supported at all
+        return SUPPORTED_MEDIA.get(ext.lower(), UNKNOWN)
+    return media_type
+
+def get_media_type(file_path: Path) -> MediaType:
+    return media_type_for_extension(file_path.suffix)
\ No newline at end of file
@@ -1,47 +1,105 @@
+import os
+import queue
 import shutil
+import subprocess
 import sys
 import logging
 import json
+import tempfile
+import concurrent.futures
 import exiftool
+from contextlib import contextmanager
 from pathlib import Path
 
-from typing import Dict
+from typing import Any, Dict, Iterator, Optional
 from exiftool.exceptions import ExifToolExecuteException
 from .media_type import MediaType
 from .media_metadata import MediaMetadata
+from .exif_reader import read_metadata_native
 
 logger = logging.getLogger(__name__)
 
+# orjson is optional; it parses the many small sidecars several times faster than json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# -fast stops ExifTool from scanning past the metadata for JPEG trailers and AVI/WAV data;
+# none of the tags we read live there
+READ_PARAMS = ["-n", "-fast"]
+# Shared by the argfile and stay_open write paths. to_tags produces print-converted values
+# (e.g. unsigned GPS coordinates with N/S refs), so writes must not use -n.
+WRITE_PARAMS = ["-overwrite_original"]
+
+def parse_json_sidecar_file(json_path: Path) -> MediaMetadata:
+    """Parses a JSON sidecar file. A module-level function so it can run in worker processes."""
+    try:
+        with open(json_path, 'rb') as f:
+            # Both parsers take UTF-8 bytes directly
+            data = _json_loads(f.read())
+        
+        metadata = MediaMetadata.from_json(data)
+        return metadata
+    except Exception as e:
+        logger.warning(f"Failed to parse JSON {json_path}: {e}")
+        return MediaMetadata()
+
 class MetadataHandler:
     """Handles parsing JSON sidecars and reading/writing metadata via PyExifTool."""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = 1):
         # PyExifTool will look for 'exiftool' in PATH by default.
         exif_tool_path = shutil.which("exiftool")
         if exif_tool_path is None:
             logger.error("ExifTool not found in PATH. Please install ExifTool.")
             sys.exit(1)
-        self._exif_tool = exiftool.ExifToolHelper()
         logger.info(f"Using ExifTool at {exif_tool_path}")
-        self._exif_tool.executable = exif_tool_path
+        # Each stay_open process handles one command at a time, so keep a pool of them
+        # that threads check out. Only the first is started eagerly; the others start
+        # (via auto_start) the first time they are used.
+        self._pool: list[exiftool.ExifToolHelper] = []
+        self._free: queue.Queue = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            helper = exiftool.ExifToolHelper()
+            helper.executable = exif_tool_path
+            self._pool.append(helper)
+            self._free.put(helper)
+        self._exif_tool = self._pool[0]
         self._exif_tool.run()
 
+    def __enter__(self) -> 'MetadataHandler':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __del__(self):
-        if self._exif_tool:
-            self._exif_tool.terminate()
-            self._exif_tool = None
+        self.close()
+
+    def close(self):
+        """Shuts down the stay_open ExifTool processes.
+
+        The helpers are created with auto_start, so any later read or write transparently
+        starts a fresh process again.
+        """
+        for exif_tool in getattr(self, '_pool', []):
+            if exif_tool.running:
+                exif_tool.terminate()
+
+    @contextmanager
+    def _acquire(self) -> Iterator[exiftool.ExifToolHelper]:
+        """Checks out an idle ExifTool helper for the calling thread."""
+        exif_tool = self._free.get()
+        try:
+            yield exif_tool
+        finally:
+            self._free.put(exif_tool)
 
     def parse_json_sidecar(self, json_path: Path) -> MediaMetadata:
         """Parses the JSON sidecar file and extracts relevant metadata."""
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            metadata = MediaMetadata.from_json(data)
-            return metadata
-        except Exception as e:
-            logger.warning(f"Failed to parse JSON {json_path}: {e}")
-            return MediaMetadata()
+        return parse_json_sidecar_file(json_path)
 
     def read_metadata_batch(self, file_paths: list[tuple[Path, MediaType]]) -> Dict[Path, MediaMetadata]:
         """Reads metadata for multiple files in a batch."""
@@ -50,17 +108,46 @@ class MetadataHandler:
 
         results = {}
         
+        # Files whose metadata is just plain EXIF dates are read natively; only the rest need ExifTool
+        exiftool_paths = []
+        for file_path, media_type in file_paths:
+            if not media_type.supports_read:
+                # Nothing ExifTool could report for this format
+                results[file_path] = MediaMetadata()
+                continue
+            metadata = read_metadata_native(file_path, media_type)
+            if metadata is None:
+                exiftool_paths.append((file_path, media_type))
+            else:
+                results[file_path] = metadata
+        if not exiftool_paths:
+            return results
+        
+        # Spread larger batches over the pool so several ExifTool processes read at once
+        chunk_count = min(len(self._pool), len(exiftool_paths))
+        if chunk_count == 1:
+            results.update(self._read_exiftool(exiftool_paths))
+        else:
+            chunks = [exiftool_paths[i::chunk_count] for i in range(chunk_count)]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=chunk_count) as executor:
+                for chunk_results in executor.map(self._read_exiftool, chunks):
+                    results.update(chunk_results)
+        return results
+
+    def _read_exiftool(self, file_paths: list[tuple[Path, MediaType]]) -> Dict[Path, MediaMetadata]:
+        """Reads metadata for a batch of files with one ExifTool call."""
+        results = {}
         try:
+            # Create a map of resolved path string to (Path, MediaType); each path is resolved once
+            path_map = {str(file_path.resolve()): (file_path, media_type) for file_path, media_type in file_paths}
+            
             # ExifToolHelper.get_tags accepts a list of filenames
-            file_strs = [str(f.resolve()) for f, _ in file_paths]
-            data_list = self._exif_tool.get_tags(file_strs, tags=MediaMetadata.READ_TAGS, params=["-n"])
+            with self._acquire() as exif_tool:
+                data_list = exif_tool.get_tags(list(path_map), tags=MediaMetadata.READ_TAGS, params=READ_PARAMS)
             
             # Map results by SourceFile
             # ExifTool returns 'SourceFile' which matches the input path (usually absolute if input was absolute)
             # We need to be careful about matching.
-            
-            # Create a map of resolved path string to (Path, MediaType)
-            path_map = {str(file_path.resolve()): (file_path, media_type) for file_path, media_type in file_paths}
 
             for data in data_list:
                 source_file = data.get('SourceFile')
@@ -73,6 +160,9 @@ class MetadataHandler:
                     # Let's normalize just in case.
                     
                     original_path_info = path_map.get(source_file)
+                    if not original_path_info:
+                        # Separators only differ lexically; normalize before touching the filesystem
+                        original_path_info = path_map.get(os.path.normpath(source_file))
                     if not original_path_info:
                         # Try resolving/normalizing if direct match fails
                         try:
@@ -111,21 +201,88 @@ class MetadataHandler:
 
         if dry_run:
             for file_path, tags in valid_ops:
-                logger.info(f"[DRY RUN] Writing tags to {file_path}: {tags}")
+                logger.info("[DRY RUN] Writing tags to %s: %s", file_path, tags)
             return
 
+        # Stream all files through a single ExifTool run via an argfile. Ops that can't be
+        # expressed as argfile lines, or a failed launch, go through the stay_open process.
+        argfile_ops = []
+        fallback_ops = []
+        for file_path, tags in valid_ops:
+            args = self._to_write_args(file_path, tags)
+            if args is None:
+                fallback_ops.append((file_path, tags))
+            else:
+                argfile_ops.append((file_path, tags, args))
+
+        if argfile_ops and not self._write_argfile([args for _, _, args in argfile_ops]):
+            fallback_ops.extend((file_path, tags) for file_path, tags, _ in argfile_ops)
+
+        if fallback_ops:
+            self._write_stay_open(fallback_ops)
+
+    @staticmethod
+    def _to_write_args(file_path: Path, tags: Dict[str, Any]) -> Optional[list[str]]:
+        """Builds the argfile lines for one file, or None if they can't be expressed one per line."""
+        args = []
+        for tag, value in tags.items():
+            for item in (value if isinstance(value, list) else [value]):
+                args.append(f"-{tag}={item}")
+        args.append(str(file_path))
+        args.append("-execute")
+        # Argfiles hold one argument per line, trim surrounding whitespace and treat '#' lines as comments
+        if any('\n' in arg or '\r' in arg or arg.startswith('#') or arg != arg.strip() for arg in args):
+            return None
+        return args
+
+    def _write_argfile(self, argfile_ops: list[list[str]]) -> bool:
+        """Writes all ops with a single ExifTool run driven by an -@ argfile.
+
+        Returns False if ExifTool could not be run at all, so the caller can fall back.
+        """
+        argfile_path = None
+        try:
+            fd, argfile_path = tempfile.mkstemp(suffix='.args', text=True)
+            with os.fdopen(fd, 'w', encoding='utf-8') as argfile:
+                for args in argfile_ops:
+                    argfile.write('\n'.join(args))
+                    argfile.write('\n')
+
+            result = subprocess.run(
+                [self._exif_tool.executable, "-@", argfile_path,
+                 "-common_args", *WRITE_PARAMS, "-charset", "filename=utf8"],
+                capture_output=True, text=True, encoding='utf-8', errors='replace'
+            )
+        except OSError as e:
+            logger.error(f"ExifTool argfile write failed, falling back to per-file writes: {e}")
+            return False
+        finally:
+            if argfile_path is not None:
+                try:
+                    os.unlink(argfile_path)
+                except OSError:
+                    pass
+
+        if result.returncode != 0:
+            for line in result.stderr.splitlines():
+                if line.strip():
+                    logger.error(f"ExifTool failed: {line}")
+        else:
+            logger.debug(f"Updated metadata for {len(argfile_ops)} files")
+        return True
+
+    def _write_stay_open(self, valid_ops: list[tuple[Path, Dict[str, Any]]]):
+        """Writes ops one file at a time through the stay_open ExifTool process."""
         try:
-            # PyExifTool doesn't have a direct "batch set_tags with different tags per file" method easily accessible 
-            # without using execute directly or looping.
-            # However, we can loop efficiently if the process is open.
             for file_path, tags in valid_ops:
                 try:
-                    self._exif_tool.set_tags(
-                        [str(file_path)],
-                        tags=tags,
-                        params=["-overwrite_original"]
-                    )
-                    logger.debug(f"Updated metadata for {file_path}")
+                    with self._acquire() as exif_tool:
+                        exif_tool.set_tags(
+                            [str(file_path)],
+                            tags=tags,
+                            params=WRITE_PARAMS
+                        )
+                    logger.debug("Updated metadata for %s", file_path)
                 except ExifToolExecuteException as e:
                     logger.error(f"ExifTool failed for {file_path}: {e.stderr}")
                 except Exception as e:
@@ -1,8 +1,9 @@
 import sqlite3
 import json
 import logging
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Iterator
 from datetime import datetime
 from enum import Enum
 
@@ -29,6 +30,16 @@ class ProcessingPhase(str, Enum):
     RESOLUTION = 'RESOLUTION'
     EXECUTION = 'EXECUTION'
 
+def _metadata_json(metadata: MediaMetadata) -> str:
+    """Serializes metadata like json.dumps(asdict(metadata)) without asdict's recursive deep copy."""
+    gps = metadata.gps
+    return json.dumps({
+        'timestamp': metadata.timestamp,
+        'people': metadata.people,
+        'gps': None if gps is None else {'latitude': gps.latitude, 'longitude': gps.longitude, 'altitude': gps.altitude},
+        'url': metadata.url,
+    })
+
 class PersistenceManager:
     """Manages persistence using SQLite."""
 
@@ -43,6 +54,8 @@ class PersistenceManager:
     def __init__(self, db_path: str | Path):
         self.db_path = db_path
         self.conn = None
+        # Nesting depth of batch() blocks; writes are only committed outside them
+        self._batch_depth = 0
         # If in-memory, initialize immediately to keep connection open
         if str(db_path) == MEMORY:
             self.initialize()
@@ -52,8 +65,36 @@ class PersistenceManager:
             return
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        self._configure()
         self._create_tables()
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Groups the writes made inside the block into one transaction, committed at the end."""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            self._commit()
+
+    def _commit(self):
+        if not self._batch_depth:
+            self.conn.commit()
+
+    def _configure(self):
+        # The database is a per-run work queue: favour throughput over durability of the
+        # last few transactions. WAL is ignored for in-memory databases.
+        for pragma in (
+            'journal_mode=WAL',
+            'synchronous=NORMAL',
+            'temp_store=MEMORY',
+            'mmap_size=268435456',
+            'cache_size=-65536',
+            'busy_timeout=5000',
+        ):
+            self.conn.execute(f'PRAGMA {pragma}')
+
     def _create_tables(self):
         cursor = self.conn.cursor()
         
@@ -84,7 +125,20 @@ class PersistenceManager:
                 FOREIGN KEY(file_id) REFERENCES files(id)
             )
         ''')
-        
+
+        # Metadata ExifTool last read from existing targets, valid while size and mtime are unchanged
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS dest_fingerprints (
+                target_path TEXT PRIMARY KEY,
+                file_size INTEGER,
+                mtime REAL,
+                data TEXT
+            )
+        ''')
+
+        # Every phase selects its work by status; source_path is already indexed by UNIQUE
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_status ON files(status)')
+
         self.conn.commit()
 
     def add_file(self, path: Path, media_type: MediaType, file_size: int, mtime: float) -> int:
@@ -94,7 +148,7 @@ class PersistenceManager:
                 INSERT INTO files (source_path, media_type, file_size, mtime, status, phase)
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (str(path), media_type.type, file_size, mtime, FileStatus.NEW.value, ProcessingPhase.DISCOVERY.value))
-            self.conn.commit()
+            self._commit()
             return cursor.lastrowid
         except sqlite3.IntegrityError:
             # File might already exist, retrieve it
@@ -103,6 +157,18 @@ class PersistenceManager:
                 return existing['id']
             raise
 
+    def add_files(self, files: List[Tuple[Path, MediaType, int, float]]):
+        """Adds many files in a single transaction. Files already present are left unchanged."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            INSERT OR IGNORE INTO files (source_path, media_type, file_size, mtime, status, phase)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (str(path), media_type.type, file_size, mtime, FileStatus.NEW.value, ProcessingPhase.DISCOVERY.value)
+            for path, media_type, file_size, mtime in files
+        ])
+        self._commit()
+
     def get_file_by_path(self, path: Path) -> Optional[Dict[str, Any]]:
         cursor = self.conn.cursor()
         cursor.execute('SELECT * FROM files WHERE source_path = ?', (str(path),))
@@ -122,7 +188,17 @@ class PersistenceManager:
             SET status = ?, phase = ?, error_message = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         ''', (status.value, phase.value, error, file_id))
-        self.conn.commit()
+        self._commit()
+    
+    def update_statuses(self, file_ids: List[int], status: FileStatus, phase: ProcessingPhase):
+        """Sets the same status on many files with one statement."""
+        cursor = self.conn.cursor()
+        cursor.executemany('''
+            UPDATE files 
+            SET status = ?, phase = ?, error_message = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', [(status.value, phase.value, file_id) for file_id in file_ids])
+        self._commit()
     
     def update_target_path(self, file_id: int, target_path: Path):
         cursor = self.conn.cursor()
@@ -131,18 +207,17 @@ class PersistenceManager:
             SET target_path = ?, updated_at = CURRENT_TIMESTAMP
             WHERE id = ?
         ''', (str(target_path), file_id))
-        self.conn.commit()
+        self._commit()
 
     def save_metadata(self, file_id: int, source: str, metadata: MediaMetadata):
         cursor = self.conn.cursor()
-        from dataclasses import asdict
-        data_json = json.dumps(asdict(metadata))
+        data_json = _metadata_json(metadata)
         
         cursor.execute('''
             INSERT OR REPLACE INTO metadata (file_id, source, data)
             VALUES (?, ?, ?)
         ''', (file_id, source, data_json))
-        self.conn.commit()
+        self._commit()
 
     def get_metadata(self, file_id: int, source: str) -> Optional[MediaMetadata]:
         cursor = self.conn.cursor()
@@ -153,14 +228,80 @@ class PersistenceManager:
             return MediaMetadata(**data_dict)
         return None
 
+    def get_metadata_for_files(self, file_ids: List[int], source: str) -> Dict[int, MediaMetadata]:
+        """Returns the metadata of the given source for many files; files without it are left out."""
+        cursor = self.conn.cursor()
+        result = {}
+        # Stay below SQLite's limit on bound parameters
+        for start in range(0, len(file_ids), 500):
+            chunk = file_ids[start:start + 500]
+            placeholders = ','.join(['?'] * len(chunk))
+            cursor.execute(f'SELECT file_id, data FROM metadata WHERE source = ? AND file_id IN ({placeholders})', [source] + chunk)
+            for row in cursor.fetchall():
+                result[row['file_id']] = MediaMetadata(**json.loads(row['data']))
+        return result
+
+    def save_dest_fingerprint(self, target_path: Path, file_size: int, mtime: float, metadata: MediaMetadata):
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO dest_fingerprints (target_path, file_size, mtime, data)
+            VALUES (?, ?, ?, ?)
+        ''', (str(target_path), file_size, mtime, _metadata_json(metadata)))
+        self._commit()
+
+    def get_dest_fingerprint(self, target_path: Path) -> Optional[Dict[str, Any]]:
+        """Returns the cached file_size, mtime and metadata of a target, if any."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT file_size, mtime, data FROM dest_fingerprints WHERE target_path = ?', (str(target_path),))
+        row = cursor.fetchone()
+        if row:
+            return {
+                'file_size': row['file_size'],
+                'mtime': row['mtime'],
+                'metadata': MediaMetadata(**json.loads(row['data'])),
+            }
+        return None
+
     def get_files_by_status(self, status: List[FileStatus], limit: int = 1000) -> List[Dict[str, Any]]:
         cursor = self.conn.cursor()
         placeholders = ','.join(['?'] * len(status))
-        query = f'SELECT * FROM files WHERE status IN ({placeholders}) LIMIT ?'
+        # Ids follow the scan order, which visits each directory's files together
+        query = f'SELECT * FROM files WHERE status IN ({placeholders}) ORDER BY id LIMIT ?'
         args = [s.value for s in status] + [limit]
         cursor.execute(query, args)
         return [dict(row) for row in cursor.fetchall()]
     
+    def iter_files_by_status(self, status: List[FileStatus], batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Yields the files in the given statuses in id order, batch_size at a time.
+        
+        Each batch is queried once the previous one has been handled and starts after its last
+        id, so files whose status the caller leaves unchanged are not returned again.
+        """
+        cursor = self.conn.cursor()
+        placeholders = ','.join(['?'] * len(status))
+        query = f'SELECT * FROM files WHERE status IN ({placeholders}) AND id > ? ORDER BY id LIMIT ?'
+        values = [s.value for s in status]
+        last_id = 0
+        while True:
+            cursor.execute(query, values + [last_id, batch_size])
+            files = [dict(row) for row in cursor.fetchall()]
+            if not files:
+                return
+            last_id = files[-1]['id']
+            yield files
+
+    def get_files_with_shared_size(self, status: FileStatus) -> List[Dict[str, Any]]:
+        """Returns files in the given status whose size matches another such file, grouped by size."""
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT * FROM files
+            WHERE status = ? AND file_size IN (
+                SELECT file_size FROM files WHERE status = ? GROUP BY file_size HAVING COUNT(*) > 1
+            )
+            ORDER BY file_size, id
+        ''', (status.value, status.value))
+        return [dict(row) for row in cursor.fetchall()]
+
     def get_all_files(self) -> List[Dict[str, Any]]:
         cursor = self.conn.cursor()
         cursor.execute('SELECT * FROM files')
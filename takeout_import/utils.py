@@ -1,6 +1,11 @@
+import os
+import mmap
 import time
 import logging
+from contextlib import contextmanager
 from functools import wraps
+from pathlib import Path
+from typing import Iterator
 
 logger = logging.getLogger(__name__)
 
@@ -21,3 +26,26 @@ def log_execution_time(subject="Total"):
                     logger.info(f"{subject} execution time: {seconds}s")
         return wrapper
     return decorator
+
+@contextmanager
+def map_file(path: Path, length: int = 0) -> Iterator[memoryview]:
+    """Memory-maps the first `length` bytes of a file read-only (the whole file if 0).
+
+    Empty files can't be mapped, so they yield an empty view.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if length:
+            size = min(size, length)
+        if size == 0:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+            if not length and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                # Whole-file mappings are walked front to back
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
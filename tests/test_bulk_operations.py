@@ -63,6 +63,32 @@ def test_read_metadata_batch(test_dirs, handler):
     assert results[file1].timestamp == ts1
     assert results[file2].timestamp == ts2
 
+def test_read_metadata_batch_pool(test_dirs):
+    source_dir, _ = test_dirs
+    handler = MetadataHandler(pool_size=3)
+    files = [source_dir / f"file{i}.jpg" for i in range(5)]
+    for i, f in enumerate(files):
+        create_dummy_image(f)
+        # GPS data keeps these files off the native path, so every read goes through the pool
+        handler._exif_tool.set_tags(
+            [str(f)],
+            tags={'DateTimeOriginal': f"2023:01:0{i + 1} 12:00:00", 'GPSLatitude': 10.0 + i, 'GPSLatitudeRef': 'N',
+                  'GPSLongitude': 20.0, 'GPSLongitudeRef': 'E'},
+            params=['-overwrite_original']
+        )
+    
+    try:
+        results = handler.read_metadata_batch([(f, SUPPORTED_MEDIA.get('.jpg')) for f in files])
+        
+        assert len(results) == 5
+        for i, f in enumerate(files):
+            assert results[f].timestamp == datetime(2023, 1, i + 1, 12, 0, 0).timestamp()
+            assert results[f].gps.latitude == pytest.approx(10.0 + i)
+        assert sum(helper.running for helper in handler._pool) == 3
+    finally:
+        handler.close()
+    assert not any(helper.running for helper in handler._pool)
+
 def test_read_metadata_batch_missing_file(test_dirs, handler, caplog):
     source_dir, _ = test_dirs
     # Setup files
@@ -89,7 +115,7 @@ def test_read_metadata_batch_missing_file(test_dirs, handler, caplog):
     )
     
     # Call batch read with missing file2
-    # ExifTool fails the batch if a file is missing, so we expect empty results and an error log
+    # The existing files are read natively; the missing one is left to ExifTool, which fails and logs an error
     with caplog.at_level(logging.ERROR):
         results = handler.read_metadata_batch([
             (file1, SUPPORTED_MEDIA.get('.jpg')), 
@@ -99,8 +125,10 @@ def test_read_metadata_batch_missing_file(test_dirs, handler, caplog):
         
         assert any("Batch read failed" in r.message for r in caplog.records)
     
-    # Verify results are empty due to failure
-    assert len(results) == 0
+    # Verify only the missing file has no result
+    assert file2 not in results
+    assert results[file1].timestamp == datetime.strptime(ts1_str, "%Y:%m:%d %H:%M:%S").timestamp()
+    assert results[file3].timestamp == datetime.strptime(ts3_str, "%Y:%m:%d %H:%M:%S").timestamp()
 
 def test_write_metadata_batch(test_dirs, handler):
     source_dir, _ = test_dirs
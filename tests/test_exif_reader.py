@@ -0,0 +1,142 @@
+import struct
+import pytest
+from datetime import datetime
+
+from takeout_import.exif_reader import read_metadata_native
+from takeout_import.media_type import SUPPORTED_MEDIA
+
+JPEG = SUPPORTED_MEDIA['.jpg']
+PNG = SUPPORTED_MEDIA['.png']
+
+def build_tiff(ifd0_dates=None, exif_dates=None, extra_ifd0_tags=(), extra_exif_tags=(), order='<'):
+    """Builds a TIFF block with ASCII date tags in IFD0 and an optional ExifIFD."""
+    ifd0_dates = dict(ifd0_dates or {})
+    ifd0_tags = [(tag, 2, value.encode() + b'\x00') for tag, value in ifd0_dates.items()]
+    ifd0_tags += [(tag, 4, 0) for tag in extra_ifd0_tags]
+    exif_tags = [(tag, 2, value.encode() + b'\x00') for tag, value in (exif_dates or {}).items()]
+    exif_tags += [(tag, 4, 0) for tag in extra_exif_tags]
+    has_exif = exif_dates is not None or extra_exif_tags
+
+    def ifd_size(tags):
+        return 2 + 12 * len(tags) + 4
+
+    ifd0_count = len(ifd0_tags) + (1 if has_exif else 0)
+    ifd0_offset = 8
+    exif_offset = ifd0_offset + 2 + 12 * ifd0_count + 4
+    data_offset = exif_offset + (ifd_size(exif_tags) if has_exif else 0)
+
+    data = b''
+    def entries(tags):
+        nonlocal data
+        out = b''
+        for tag, typ, value in sorted(tags, key=lambda t: t[0]):
+            if typ == 2:
+                out += struct.pack(order + 'HHII', tag, typ, len(value), data_offset + len(data))
+                data += value
+            else:
+                out += struct.pack(order + 'HHII', tag, typ, 1, value)
+        return out
+
+    ifd0 = list(ifd0_tags)
+    if has_exif:
+        ifd0.append((0x8769, 4, exif_offset))
+    header = (b'II' if order == '<' else b'MM') + struct.pack(order + 'HI', 42, ifd0_offset)
+    block = header + struct.pack(order + 'H', ifd0_count) + entries(ifd0) + b'\x00' * 4
+    if has_exif:
+        block += struct.pack(order + 'H', len(exif_tags)) + entries(exif_tags) + b'\x00' * 4
+    return block + data
+
+def build_jpeg(*segments):
+    body = b''.join(b'\xff' + bytes([marker]) + struct.pack('>H', len(payload) + 2) + payload
+                    for marker, payload in segments)
+    return b'\xff\xd8' + body + b'\xff\xda\x00\x02' + b'\x00' * 64 + b'\xff\xd9'
+
+def build_png(*chunks):
+    body = b''.join(struct.pack('>I', len(data)) + ctype + data + b'\x00' * 4 for ctype, data in chunks)
+    return b'\x89PNG\r\n\x1a\n' + body + struct.pack('>I', 0) + b'IEND' + b'\x00' * 4
+
+JFIF = (0xE0, b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00')
+
+@pytest.mark.parametrize("order", ['<', '>'])
+def test_jpeg_exif_dates(tmp_path, order):
+    path = tmp_path / "photo.jpg"
+    tiff = build_tiff(
+        ifd0_dates={0x0132: "2023:01:03 12:00:00"},
+        exif_dates={0x9003: "2023:01:01 12:00:00", 0x9004: "2023:01:02 12:00:00"},
+        order=order
+    )
+    path.write_bytes(build_jpeg(JFIF, (0xE1, b'Exif\x00\x00' + tiff)))
+    
+    metadata = read_metadata_native(path, JPEG)
+    assert metadata.timestamp == datetime(2023, 1, 1, 12, 0, 0).timestamp()
+    assert metadata.gps is None
+    assert metadata.people is None
+
+def test_jpeg_modify_date_fallback(tmp_path):
+    path = tmp_path / "photo.jpg"
+    tiff = build_tiff(ifd0_dates={0x0132: "2023:01:03 12:00:00"})
+    path.write_bytes(build_jpeg((0xE1, b'Exif\x00\x00' + tiff)))
+    
+    assert read_metadata_native(path, JPEG).timestamp == datetime(2023, 1, 3, 12, 0, 0).timestamp()
+
+def test_jpeg_without_metadata(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(build_jpeg(JFIF))
+    
+    metadata = read_metadata_native(path, JPEG)
+    assert metadata is not None
+    assert metadata.timestamp is None
+
+@pytest.mark.parametrize("segments", [
+    # GPS IFD present
+    [(0xE1, b'Exif\x00\x00' + build_tiff(exif_dates={0x9003: "2023:01:01 12:00:00"}, extra_ifd0_tags=[0x8825]))],
+    # UserComment (URL) present
+    [(0xE1, b'Exif\x00\x00' + build_tiff(exif_dates={0x9003: "2023:01:01 12:00:00"}, extra_exif_tags=[0x9286]))],
+    # XMP segment
+    [(0xE1, b'http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>')],
+    # IPTC segment
+    [(0xED, b'Photoshop 3.0\x00')],
+    # Unparseable date
+    [(0xE1, b'Exif\x00\x00' + build_tiff(exif_dates={0x9003: "    :  :     :  :  "}))],
+    # Corrupt TIFF header
+    [(0xE1, b'Exif\x00\x00XX')],
+])
+def test_jpeg_falls_back_to_exiftool(tmp_path, segments):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(build_jpeg(*segments))
+    
+    assert read_metadata_native(path, JPEG) is None
+
+def test_truncated_jpeg_falls_back(tmp_path):
+    path = tmp_path / "photo.jpg"
+    data = build_jpeg((0xE1, b'Exif\x00\x00' + build_tiff(exif_dates={0x9003: "2023:01:01 12:00:00"})))
+    path.write_bytes(data[:30])
+    
+    assert read_metadata_native(path, JPEG) is None
+
+def test_png_exif_dates(tmp_path):
+    path = tmp_path / "image.png"
+    tiff = build_tiff(exif_dates={0x9003: "2023:01:01 12:00:00"})
+    path.write_bytes(build_png((b'IHDR', b'\x00' * 13), (b'eXIf', tiff), (b'IDAT', b'\x00' * 32)))
+    
+    assert read_metadata_native(path, PNG).timestamp == datetime(2023, 1, 1, 12, 0, 0).timestamp()
+
+@pytest.mark.parametrize("chunk", [b'tEXt', b'iTXt', b'tIME'])
+def test_png_metadata_chunks_fall_back(tmp_path, chunk):
+    path = tmp_path / "image.png"
+    path.write_bytes(build_png((b'IHDR', b'\x00' * 13), (b'IDAT', b'\x00' * 32), (chunk, b'\x00' * 7)))
+    
+    assert read_metadata_native(path, PNG) is None
+
+def test_unsupported_formats(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b'\x00' * 64)
+    assert read_metadata_native(path, SUPPORTED_MEDIA['.mp4']) is None
+    
+    # Not actually a JPEG
+    path = tmp_path / "fake.jpg"
+    path.write_bytes(b'not a jpeg')
+    assert read_metadata_native(path, JPEG) is None
+    
+    # Missing file
+    assert read_metadata_native(tmp_path / "missing.jpg", JPEG) is None
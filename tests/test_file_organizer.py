@@ -1,4 +1,9 @@
+import os
+import errno
+import stat
+import hashlib
 import pytest
+from datetime import datetime
 
 from takeout_import.file_organizer import FileOrganizer
 
@@ -28,3 +33,173 @@ def test_resolve_collision(organizer):
     resolved.touch()
     resolved_2 = organizer.resolve_collision(target)
     assert resolved_2.name == "test_2.jpg"
+
+def test_get_target_path_month_boundaries(organizer):
+    # Consecutive lookups across month and year boundaries must not reuse a stale month
+    for dt in [
+        datetime(2023, 1, 31, 23, 59, 59),
+        datetime(2023, 2, 1, 0, 0, 0),
+        datetime(2023, 2, 15, 12, 0, 0),
+        datetime(2022, 12, 31, 23, 59, 59),
+        datetime(2023, 12, 31, 23, 59, 59),
+        datetime(2024, 1, 1, 0, 0, 0),
+        datetime(2023, 2, 28, 23, 59, 59),
+    ]:
+        path = organizer.get_target_path(dt.timestamp(), "test.jpg")
+        assert path.parent == organizer.dest_root / f"{dt.year:04d}" / f"{dt.month:02d}"
+    
+    # One directory per month, shared by every file in it
+    assert len(organizer._month_dirs) == 5
+    assert organizer.get_target_path(datetime(2023, 2, 2).timestamp(), "a.jpg").parent == organizer._month_dirs[(2023, 2)]
+
+def test_resolve_collision_with_listing(organizer):
+    ts = 1672531200
+    target = organizer.get_target_path(ts, "test.jpg")
+    
+    # Directory doesn't exist yet
+    assert organizer.list_names(target.parent) == set()
+    assert organizer.resolve_collision(target, set()) == target
+    
+    target.parent.mkdir(parents=True)
+    target.touch()
+    (target.parent / "test_1.jpg").touch()
+    names = organizer.list_names(target.parent)
+    assert names == {"test.jpg", "test_1.jpg"}
+    assert organizer.resolve_collision(target, names).name == "test_2.jpg"
+    assert organizer.resolve_collision(target.parent / "other.jpg", names).name == "other.jpg"
+
+@pytest.mark.parametrize("original, expected", [
+    ("motion.mp", "motion.mp4"),
+    ("MOTION.MP", "MOTION.mp4"),
+    ("archive.tar.mp", "archive.tar.mp4"),
+    ("movie.mp4", "movie.mp4"),
+    (".mp", ".mp"),
+])
+def test_get_target_path_motion_photo(organizer, original, expected):
+    ts = 1686830400
+    assert organizer.get_target_path(ts, original).name == expected
+
+def test_copy_file_creates_target_dir(organizer, tmp_path):
+    src = tmp_path / "src.jpg"
+    src.write_bytes(b"data")
+    ts = 1686830400
+    
+    for name in ("a.jpg", "b.jpg"):
+        dest = organizer.get_target_path(ts, name)
+        organizer.copy_file(src, dest, ts)
+        assert dest.read_bytes() == b"data"
+        assert dest.stat().st_mtime == ts
+    
+    assert organizer._created_dirs == {dest.parent}
+
+@pytest.mark.parametrize("reflink", [False, True])
+def test_copy_file_contents(tmp_path, reflink):
+    organizer = FileOrganizer(tmp_path / "dest", reflink=reflink)
+    src = tmp_path / "video.mp4"
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    src.write_bytes(data)
+    ts = 1686830400
+    
+    dest = organizer.get_target_path(ts, src.name)
+    organizer.copy_file(src, dest, ts)
+    
+    assert dest.read_bytes() == data
+    assert dest.stat().st_mtime == ts
+
+@pytest.mark.parametrize("sendfile", [True, False])
+def test_copy_file_fallback_keeps_mode_and_mtime(organizer, tmp_path, monkeypatch, sendfile):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    if not sendfile:
+        # Falls through to the buffered userspace copy
+        monkeypatch.setattr(os, "sendfile", lambda *args: unsupported(), raising=False)
+    
+    src = tmp_path / "src.jpg"
+    data = os.urandom(5 * 1024 * 1024 + 3)
+    src.write_bytes(data)
+    src.chmod(0o640)
+    ts = 1686830400
+    
+    dest = organizer.get_target_path(ts, src.name)
+    organizer.copy_file(src, dest, ts)
+    
+    assert dest.read_bytes() == data
+    assert dest.stat().st_mtime == ts
+    assert stat.S_IMODE(dest.stat().st_mode) == 0o640
+
+@pytest.mark.parametrize("sendfile", [True, False])
+def test_copy_file_range_returning_zero_falls_back(organizer, tmp_path, monkeypatch, sendfile):
+    # Some filesystems report 0 bytes copied instead of raising EXDEV/ENOSYS
+    monkeypatch.setattr(os, "copy_file_range", lambda *args: 0, raising=False)
+    if not sendfile:
+        monkeypatch.setattr(os, "sendfile", lambda *args: 0, raising=False)
+    
+    src = tmp_path / "src.jpg"
+    data = os.urandom(1024 * 1024 + 5)
+    src.write_bytes(data)
+    ts = 1686830400
+    
+    dest = organizer.get_target_path(ts, src.name)
+    organizer.copy_file(src, dest, ts)
+    
+    assert dest.read_bytes() == data
+
+def test_copy_range_stopping_mid_file_raises(tmp_path, monkeypatch):
+    calls = []
+    def copy_once(*args):
+        calls.append(args)
+        return 10 if len(calls) == 1 else 0
+    monkeypatch.setattr(os, "copy_file_range", copy_once, raising=False)
+    
+    src = tmp_path / "src.jpg"
+    src.write_bytes(b"x" * 100)
+    with open(src, 'rb') as fsrc, open(tmp_path / "dest.jpg", 'wb') as fdst:
+        with pytest.raises(OSError):
+            FileOrganizer._copy_range(fsrc, fdst, 100)
+
+def test_copy_file_keeps_xattrs(organizer, tmp_path):
+    src = tmp_path / "src.jpg"
+    src.write_bytes(b"data")
+    try:
+        os.setxattr(src, "user.takeout_test", b"value")
+    except (AttributeError, OSError):
+        pytest.skip("user extended attributes not supported here")
+    ts = 1686830400
+    
+    dest = organizer.get_target_path(ts, src.name)
+    organizer.copy_file(src, dest, ts)
+    
+    assert os.getxattr(dest, "user.takeout_test") == b"value"
+
+@pytest.mark.parametrize("use_file_digest", [True, False])
+def test_file_digest(organizer, tmp_path, monkeypatch, use_file_digest):
+    if not use_file_digest:
+        # Exercise the mmap path used before Python 3.11
+        monkeypatch.delattr(hashlib, "file_digest", raising=False)
+    data = os.urandom(2 * 1024 * 1024 + 5)
+    a = tmp_path / "a.jpg"
+    b = tmp_path / "b.jpg"
+    empty = tmp_path / "empty.jpg"
+    a.write_bytes(data)
+    b.write_bytes(data[:-1] + b"x")
+    empty.write_bytes(b"")
+    
+    assert organizer.file_digest(a, len(data), 0.0) == hashlib.blake2b(data).hexdigest()
+    assert organizer.file_digest(a, len(data), 0.0) != organizer.file_digest(b, len(data), 0.0)
+    assert organizer.file_digest(empty, 0, 0.0) == hashlib.blake2b(b"").hexdigest()
+
+def test_has_same_content(organizer, tmp_path):
+    src = tmp_path / "src.jpg"
+    src.write_bytes(b"photo")
+    same = tmp_path / "same.jpg"
+    same.write_bytes(b"photo")
+    other = tmp_path / "other.jpg"
+    other.write_bytes(b"phot0")
+    longer = tmp_path / "longer.jpg"
+    longer.write_bytes(b"photos")
+    
+    assert organizer.has_same_content(src, 5, 0.0, same)
+    assert not organizer.has_same_content(src, 5, 0.0, other)
+    assert not organizer.has_same_content(src, 5, 0.0, longer)
+    assert not organizer.has_same_content(src, 5, 0.0, tmp_path / "missing.jpg")
@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timezone
+
+from takeout_import.media_metadata import MediaMetadata, GpsData
+from takeout_import.media_type import SUPPORTED_MEDIA
+
+JPEG = SUPPORTED_MEDIA['.jpg']
+MP4 = SUPPORTED_MEDIA['.mp4']
+
+@pytest.mark.parametrize("data, expected", [
+    # DateTimeOriginal beats the other date tags regardless of order
+    ({'EXIF:CreateDate': "2022:01:01 12:00:00", 'EXIF:DateTimeOriginal': "2023:01:01 12:00:00"}, datetime(2023, 1, 1, 12)),
+    # Within a tag, EXIF beats XMP beats anything else
+    ({'QuickTime:CreateDate': "2021:01:01 12:00:00", 'XMP:CreateDate': "2022:01:01 12:00:00"}, datetime(2022, 1, 1, 12)),
+    ({'XMP:ModifyDate': "2022:01:01 12:00:00", 'EXIF:ModifyDate': "2023:01:01 12:00:00"}, datetime(2023, 1, 1, 12)),
+    # Bare tag names (no group) are recognized
+    ({'DateCreated': "2020:02:03 04:05:06+01:00"}, datetime(2020, 2, 3, 4, 5, 6)),
+    ({'EXIF:DateTimeOriginal': "0000:00:00 00:00:00"}, None),
+    ({'EXIF:Make': "Camera"}, None),
+])
+def test_from_exif_date(data, expected):
+    metadata = MediaMetadata.from_exif(data, JPEG)
+    assert metadata.timestamp == (expected.timestamp() if expected else None)
+
+def test_from_exif_date_quicktime_is_utc():
+    metadata = MediaMetadata.from_exif({'QuickTime:CreateDate': "2023:01:01 12:00:00"}, MP4)
+    assert metadata.timestamp == datetime(2023, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+
+@pytest.mark.parametrize("data, expected", [
+    ({'EXIF:GPSLatitude': 10.5, 'EXIF:GPSLatitudeRef': 'S', 'EXIF:GPSLongitude': 20.0, 'EXIF:GPSLongitudeRef': 'W',
+      'EXIF:GPSAltitude': 5}, GpsData(-10.5, -20.0, 5.0)),
+    ({'QuickTime:GPSCoordinates': "1.5, 2.5, 3.5"}, GpsData(1.5, 2.5, 3.5)),
+    # Later tags override earlier ones
+    ({'QuickTime:GPSCoordinates': "1.5, 2.5", 'XMP:GPSLatitude': 7.0}, GpsData(7.0, 2.5, None)),
+    ({'EXIF:GPSLatitude': 0.0, 'EXIF:GPSLongitude': 0.0}, None),
+    ({'EXIF:GPSLatitude': 1.0}, None),
+])
+def test_from_exif_gps(data, expected):
+    assert MediaMetadata.from_exif(data, JPEG).gps == expected
+
+def test_from_exif_people_and_url():
+    data = {
+        'XMP:Subject': ['Bob', 'Alice'],
+        'IPTC:Keywords': 'Alice',
+        'XMP:PersonInImage': ['Carol'],
+        # Only the XMP/IPTC groups listed in READ_TAGS count
+        'EXIF:Subject': 'Ignored',
+        'XMP:UserComment': '  https://photos.example/1  ',
+    }
+    metadata = MediaMetadata.from_exif(data, JPEG)
+    assert metadata.people == ['Alice', 'Bob', 'Carol']
+    assert metadata.url == 'https://photos.example/1'
+
+def test_from_exif_people_numeric_keyword():
+    metadata = MediaMetadata.from_exif({'IPTC:Keywords': [2023, 'Alice']}, JPEG)
+    assert metadata.people == ['2023', 'Alice']
+
+def test_from_exif_empty():
+    assert MediaMetadata.from_exif({'SourceFile': '/tmp/a.jpg'}, JPEG) == MediaMetadata()
+
+@pytest.mark.parametrize("value, expected", [
+    ("2023:01:31 12:34:56", datetime(2023, 1, 31, 12, 34, 56)),
+    # Forms strptime accepts that are not fixed-width
+    ("2023:1:31 12:34:56", datetime(2023, 1, 31, 12, 34, 56)),
+    ("2023:01:31  2:34:56", datetime(2023, 1, 31, 2, 34, 56)),
+    ("2023:02:30 12:34:56", None),
+    ("2023:01:31 12:34:60", None),
+    ("0000:00:00 00:00:00", None),
+    ("2023:01:31T12:34:56", None),
+    ("+023:01:31 12:34:56", None),
+])
+def test_from_exif_date_formats(value, expected):
+    metadata = MediaMetadata.from_exif({'EXIF:DateTimeOriginal': value}, JPEG)
+    assert metadata.timestamp == (expected.timestamp() if expected else None)
+
+def test_to_tags_dates():
+    ts = datetime(2023, 1, 31, 12, 34, 56, tzinfo=timezone.utc).timestamp()
+    local = datetime.fromtimestamp(ts).strftime("%Y:%m:%d %H:%M:%S")
+    # Same timestamp twice: the second call is served from the formatting cache
+    for _ in range(2):
+        assert MediaMetadata(timestamp=ts).to_tags(MP4)['QuickTime:CreateDate'] == "2023:01:31 12:34:56"
+        jpeg_tags = MediaMetadata(timestamp=ts).to_tags(JPEG)
+        assert jpeg_tags['DateTimeOriginal'] == local
+        assert jpeg_tags['XMP:DateCreated'] == local
+
+@pytest.mark.parametrize("p1, p2, expected", [
+    (['Alice', 'Bob'], ['Alice', 'Bob'], True),
+    (['Bob', 'Alice'], ['Alice', 'Bob'], True),
+    (['Alice'], ['Alice', 'Bob'], False),
+    (['Alice', 'Alice'], ['Alice', 'Bob'], False),
+    ([], None, False),
+])
+def test_is_identical_people(p1, p2, expected):
+    assert MediaMetadata(people=p1).is_identical(MediaMetadata(people=p2)) == expected
@@ -1,11 +1,13 @@
 import pytest
 import json
 import os
+import logging
 from datetime import datetime
+from pathlib import Path
 
 from takeout_import.media_processor import MediaProcessor
 from takeout_import.media_metadata import MediaMetadata
-from takeout_import.persistence_manager import PersistenceManager
+from takeout_import.persistence_manager import PersistenceManager, FileStatus, ProcessingPhase
 from takeout_import.media_type import get_media_type
 
 @pytest.fixture
@@ -35,6 +37,24 @@ def test_find_json_sidecar(processor, img_name, json_name):
     found = processor._find_json_sidecar(img)
     assert found == json_file
 
+@pytest.mark.parametrize("img_name, json_names, expected", [
+    ("image.jpg", ["image.json", "image.jpg.json", "image.jpg.supplemental-metadata.json"], "image.jpg.json"),
+    ("image.jpg", ["image.other.json", "image.json", "image.jpg.supplemental-metadata.json"], "image.json"),
+    ("image.jpg", ["image.other.json", "image.jpg.supplemental-metadata.json"], "image.jpg.supplemental-metadata.json"),
+    ("image.jpg", ["image.b.json", "image.a.json"], "image.a.json"),
+    ("image-edited.jpg", ["image.json", "image-edited.x.json"], "image-edited.x.json"),
+    ("image(1).jpg", ["image.jpg.json", "image.jpg(1).json"], "image.jpg(1).json"),
+    ("image.jpg", ["other.json"], None),
+])
+def test_find_json_sidecar_priority(processor, img_name, json_names, expected):
+    img = processor.source_dir / img_name
+    img.touch()
+    for json_name in json_names:
+        (processor.source_dir / json_name).touch()
+    
+    found = processor._find_json_sidecar(img)
+    assert found == (processor.source_dir / expected if expected else None)
+
 def test_motion_photo_mp_renaming(processor):
     # Setup: motion.mp and motion.json
     mp_file = processor.source_dir / "motion.mp"
@@ -72,10 +92,176 @@ def test_motion_photo_mp_renaming(processor):
     unexpected_dest = processor.dest_dir / "2023" / "06" / "motion.mp"
     assert not unexpected_dest.exists()
 
+def test_json_process_pool_configures_worker_logging(processor):
+    root = logging.getLogger()
+    old_level = root.level
+    root.setLevel(logging.DEBUG)
+    try:
+        with processor._json_process_pool() as pool:
+            # Loggers pickle by name, so this runs against the worker's root logger
+            assert pool.submit(logging.getLogger().getEffectiveLevel).result() == logging.DEBUG
+    finally:
+        root.setLevel(old_level)
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_phase_metadata_extraction_parses_json(processor, monkeypatch, max_workers):
+    processor.max_workers = max_workers
+    ts = datetime(2021, 5, 1, 12, 0, 0).timestamp()
+    for name in ["a.jpg", "b.jpg", "c.jpg"]:
+        (processor.source_dir / name).touch()
+    with open(processor.source_dir / "a.jpg.json", 'w') as f:
+        json.dump({"photoTakenTime": {"timestamp": str(int(ts))}, "people": [{"name": "Alice"}]}, f)
+    # Unparseable sidecars give empty metadata rather than failing the file
+    (processor.source_dir / "b.jpg.json").write_text("{not json")
+    
+    media_metadata = MediaMetadata(timestamp=ts)
+    monkeypatch.setattr(processor.metadata_handler, "read_metadata_batch",
+                        lambda file_paths: {p: media_metadata for p, _ in file_paths})
+    processor._phase_discovery()
+    processor._phase_metadata_extraction()
+    
+    files = {Path(f['source_path']).name: f for f in processor.persistence.get_all_files()}
+    assert {f['status'] for f in files.values()} == {FileStatus.METADATA_READ.value}
+    assert processor.persistence.get_metadata(files["a.jpg"]['id'], 'JSON') == MediaMetadata(timestamp=int(ts), people=["Alice"])
+    assert processor.persistence.get_metadata(files["b.jpg"]['id'], 'JSON') == MediaMetadata()
+    assert processor.persistence.get_metadata(files["c.jpg"]['id'], 'JSON') is None
+    assert processor.persistence.get_metadata(files["c.jpg"]['id'], 'MEDIA') == media_metadata
+
+@pytest.mark.parametrize("batch_size", [1000, 1])
+def test_phase_metadata_extraction_parses_shared_sidecar_once(processor, monkeypatch, batch_size):
+    ts = datetime(2021, 5, 1, 12, 0, 0).timestamp()
+    # Both files are discovered and both fall back to the stem sidecar image.json
+    for name in ["image.jpg", "image.png"]:
+        (processor.source_dir / name).touch()
+    with open(processor.source_dir / "image.json", 'w') as f:
+        json.dump({"photoTakenTime": {"timestamp": str(int(ts))}}, f)
+    
+    parsed = []
+    class InlineExecutor:
+        def map(self, fn, items, chunksize=1):
+            items = list(items)
+            parsed.extend(items)
+            return map(fn, items)
+    monkeypatch.setattr(processor.metadata_handler, "read_metadata_batch", lambda file_paths: {})
+    # With batch_size 1 the two files land in consecutive batches
+    processor.batch_size = batch_size
+    processor._phase_discovery()
+    files = processor.persistence.get_all_files()
+    assert sorted(Path(f['source_path']).name for f in files) == ["image.jpg", "image.png"]
+    
+    processor._metadata_extraction_batches(InlineExecutor())
+    
+    assert parsed == [processor.source_dir / "image.json"]
+    for f in files:
+        assert processor.persistence.get_metadata(f['id'], 'JSON') == MediaMetadata(timestamp=int(ts))
+
+def test_phase_execution_reads_existing_targets_in_one_batch(processor, monkeypatch):
+    ts = datetime(2023, 6, 15, 12, 0, 0).timestamp()
+    metadata = MediaMetadata(timestamp=ts)
+    for name in ["a.mp4", "b.mp4", "c.mp4"]:
+        src = processor.source_dir / name
+        src.write_bytes(name.encode())
+        file_id = processor.persistence.add_file(src, get_media_type(src), 5, ts)
+        processor.persistence.save_metadata(file_id, 'MERGED', metadata)
+        target_path = processor.file_organizer.get_target_path(ts, name)
+        processor.persistence.update_target_path(file_id, target_path)
+        processor.persistence.update_status(file_id, FileStatus.TARGET_RESOLVED, ProcessingPhase.RESOLUTION)
+    # a.mp4 and b.mp4 were imported by an earlier run
+    for name in ["a.mp4", "b.mp4"]:
+        target_path = processor.file_organizer.get_target_path(ts, name)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        target_path.write_bytes(b"old")
+    
+    reads = []
+    def read_metadata_batch(file_paths):
+        reads.append(sorted(p.name for p, _ in file_paths))
+        return {p: metadata for p, _ in file_paths}
+    monkeypatch.setattr(processor.metadata_handler, "read_metadata_batch", read_metadata_batch)
+    monkeypatch.setattr(processor.metadata_handler, "write_metadata_batch", lambda ops, dry_run=False: None)
+    
+    processor._phase_execution()
+    
+    # Existing targets are read once, together; identical ones are left alone
+    assert reads == [["a.mp4", "b.mp4"]]
+    target_dir = processor.dest_dir / "2023" / "06"
+    assert (target_dir / "a.mp4").read_bytes() == b"old"
+    assert (target_dir / "c.mp4").read_bytes() == b"c.mp4"
+    assert {f['status'] for f in processor.persistence.get_all_files()} == {FileStatus.SUCCESS.value}
+    
+    # A later run serves a.mp4 from the cache; b.mp4 changed and c.mp4 was never read
+    os.utime(target_dir / "b.mp4", (ts + 1, ts + 1))
+    processor.persistence.update_statuses([f['id'] for f in processor.persistence.get_all_files()], FileStatus.TARGET_RESOLVED, ProcessingPhase.RESOLUTION)
+    processor._phase_execution()
+    assert reads[1:] == [["b.mp4", "c.mp4"]]
+
+def test_phase_execution_overlaps_writes_with_next_batch(processor, monkeypatch):
+    ts = datetime(2023, 6, 15, 12, 0, 0).timestamp()
+    metadata = MediaMetadata(timestamp=ts)
+    processor.batch_size = 1
+    for name in ["a.mp4", "b.mp4", "c.mp4"]:
+        src = processor.source_dir / name
+        src.write_bytes(name.encode())
+        file_id = processor.persistence.add_file(src, get_media_type(src), 5, ts)
+        processor.persistence.save_metadata(file_id, 'MERGED', metadata)
+        processor.persistence.update_target_path(file_id, processor.file_organizer.get_target_path(ts, name))
+        # c.mp4 was copied by an interrupted run whose write never finished
+        status = FileStatus.IN_PROGRESS if name == "c.mp4" else FileStatus.TARGET_RESOLVED
+        processor.persistence.update_status(file_id, status, ProcessingPhase.EXECUTION)
+    
+    events = []
+    copy_file = processor.file_organizer.copy_file
+    def record_copy(source, target, timestamp):
+        events.append(("copy", source.name))
+        copy_file(source, target, timestamp)
+    def record_write(ops, dry_run=False):
+        events.append(("write", ops[0][0].name))
+    monkeypatch.setattr(processor.file_organizer, "copy_file", record_copy)
+    monkeypatch.setattr(processor.metadata_handler, "read_metadata_batch", lambda file_paths: {})
+    monkeypatch.setattr(processor.metadata_handler, "write_metadata_batch", record_write)
+    
+    processor._phase_execution()
+    
+    # Every batch is written, one at a time and in the order the batches were copied
+    copies = [name for kind, name in events if kind == "copy"]
+    writes = [name for kind, name in events if kind == "write"]
+    assert sorted(copies) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert writes == copies
+    assert {f['status'] for f in processor.persistence.get_all_files()} == {FileStatus.SUCCESS.value}
+
+def test_execute_single_file_reuses_identical_copy(processor, monkeypatch):
+    ts = datetime(2023, 6, 15, 12, 0, 0).timestamp()
+    metadata = MediaMetadata(timestamp=ts)
+    src = processor.source_dir / "a.jpg"
+    src.write_bytes(b"photo")
+    file_id = processor.persistence.add_file(src, get_media_type(src), 5, ts)
+    processor.persistence.save_metadata(file_id, 'MERGED', metadata)
+    target_path = processor.file_organizer.get_target_path(ts, "a.jpg")
+    processor.persistence.update_target_path(file_id, target_path)
+    # Copied by an earlier run that stopped before writing the metadata
+    target_path.parent.mkdir(parents=True)
+    target_path.write_bytes(b"photo")
+    
+    def fail_copy(*args):
+        raise AssertionError("copied again")
+    monkeypatch.setattr(processor.file_organizer, "copy_file", fail_copy)
+    
+    file_record = processor.persistence.get_file_by_id(file_id)
+    result = processor._execute_single_file(file_record, {target_path: MediaMetadata()})
+    
+    assert result == (target_path, get_media_type(src), metadata)
+
 @pytest.mark.parametrize("timestamp, expected", [
     (datetime(2023, 1, 1).timestamp(), True),
     (datetime(1999, 1, 1).timestamp(), True),
     (datetime(1998, 12, 31).timestamp(), False),
+    (datetime(1998, 12, 31, 23, 59, 59).timestamp(), False),
+    (datetime(9999, 12, 31).timestamp(), True),
+    # Around the end of year 9999 in UTC: beyond any local offset, or decided by it
+    (253402300800 - 2 * 86400, True),
+    (253402300800 + 2 * 86400, False),
+    (1e20, False),
+    (float('nan'), False),
+    (None, False),
 ])
 def test_is_valid_timestamp(processor, timestamp, expected):
     assert processor._is_valid_timestamp(timestamp) == expected
@@ -144,3 +330,79 @@ def test_process_file_no_overwrite(processor):
     
     # Verify 'timestamp' is preserved from media
     assert merged.timestamp == ts_exif
+
+def test_scan_files_recursive(processor):
+    nested = processor.source_dir / "album" / "sub"
+    nested.mkdir(parents=True)
+    (processor.source_dir / "a.jpg").touch()
+    (nested / "b.jpg").touch()
+    # Directory symlinks are not followed, matching os.walk
+    (processor.source_dir / "link").symlink_to(nested, target_is_directory=True)
+    
+    names = sorted(entry.name for entry in processor._scan_files(processor.source_dir))
+    assert names == ["a.jpg", "b.jpg"]
+
+def test_scan_files_yields_directories_whole_in_order(processor):
+    processor.max_workers = 2
+    for album in range(6):
+        album_dir = processor.source_dir / f"album{album}"
+        album_dir.mkdir()
+        for i in range(5):
+            (album_dir / f"{i}.jpg").touch()
+    
+    parents = [os.path.dirname(entry.path) for entry in processor._scan_files(processor.source_dir)]
+    
+    # Listings run in parallel, but each directory's files still come out together,
+    # in the same order on every scan
+    runs = [parent for i, parent in enumerate(parents) if i == 0 or parents[i - 1] != parent]
+    assert len(runs) == len(set(runs)) == 6
+    assert parents == [os.path.dirname(entry.path) for entry in processor._scan_files(processor.source_dir)]
+
+def test_phase_discovery_stats_in_chunks(processor, monkeypatch):
+    monkeypatch.setattr("takeout_import.media_processor.SCAN_STAT_CHUNK", 2)
+    for i in range(5):
+        (processor.source_dir / f"{i}.jpg").write_bytes(b"x" * i)
+    
+    processor._phase_discovery()
+    
+    sizes = {Path(f['source_path']).name: f['file_size'] for f in processor.persistence.get_all_files()}
+    assert sizes == {f"{i}.jpg": i for i in range(5)}
+
+def test_scan_files_indexes_json_sidecars(processor):
+    img = processor.source_dir / "image.jpg"
+    img.touch()
+    (processor.source_dir / "image.jpg.json").touch()
+    
+    names = [entry.name for entry in processor._scan_files(processor.source_dir)]
+    
+    # JSON files are indexed rather than yielded
+    assert names == ["image.jpg"]
+    assert processor._json_index[str(processor.source_dir)] == {"image.jpg.json"}
+    assert processor._find_json_sidecar(img) == processor.source_dir / "image.jpg.json"
+
+def test_phase_discovery_filters_names(processor):
+    for name in ["a.jpg", "B.JPG", "clip.mp", "a-edited.jpg", "notes.txt", ".jpg", "noext", "archive.tar.mp4"]:
+        (processor.source_dir / name).touch()
+    
+    processor._phase_discovery()
+    
+    files = {Path(f['source_path']).name: f['media_type'] for f in processor.persistence.get_all_files()}
+    assert files == {"a.jpg": "IMAGE", "B.JPG": "IMAGE", "clip.mp": "VIDEO", "archive.tar.mp4": "VIDEO"}
+
+def test_phase_deduplication(processor):
+    processor.dedup = True
+    (processor.source_dir / "album").mkdir()
+    (processor.source_dir / "a.jpg").write_bytes(b"same")
+    (processor.source_dir / "album" / "a.jpg").write_bytes(b"same")
+    (processor.source_dir / "b.jpg").write_bytes(b"diff")
+    (processor.source_dir / "c.jpg").write_bytes(b"unique size")
+    
+    processor._phase_discovery()
+    processor._phase_deduplication()
+    
+    statuses = {Path(f['source_path']).relative_to(processor.source_dir).as_posix(): f['status']
+                for f in processor.persistence.get_all_files()}
+    assert statuses['b.jpg'] == FileStatus.NEW.value
+    assert statuses['c.jpg'] == FileStatus.NEW.value
+    # Exactly one of the identical pair is kept
+    assert sorted([statuses['a.jpg'], statuses['album/a.jpg']]) == [FileStatus.NEW.value, FileStatus.SKIPPED.value]
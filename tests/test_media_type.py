@@ -0,0 +1,25 @@
+import pytest
+from pathlib import Path
+
+from takeout_import.media_type import SUPPORTED_MEDIA, UNKNOWN, get_media_type, media_type_for_extension
+
+@pytest.mark.parametrize("ext, expected", [
+    ('.jpg', SUPPORTED_MEDIA['.jpg']),
+    ('.JPG', SUPPORTED_MEDIA['.jpg']),
+    ('.Jpeg', SUPPORTED_MEDIA['.jpeg']),
+    # Mixed case falls back to lower-casing
+    ('.mP4', SUPPORTED_MEDIA['.mp4']),
+    ('.json', UNKNOWN),
+    ('', UNKNOWN),
+])
+def test_media_type_for_extension(ext, expected):
+    assert media_type_for_extension(ext) is expected
+
+def test_get_media_type():
+    assert get_media_type(Path('/photos/IMG_0001.HEIC')) is SUPPORTED_MEDIA['.heic']
+    assert get_media_type(Path('/photos/notes')) is UNKNOWN
+
+def test_supports_read():
+    assert not SUPPORTED_MEDIA['.bmp'].supports_read
+    # Never written, but RIFF/Matroska dates are still read
+    assert SUPPORTED_MEDIA['.avi'].supports_read and not SUPPORTED_MEDIA['.avi'].supports_write()
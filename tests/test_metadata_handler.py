@@ -65,3 +65,37 @@ def test_write_metadata(handler, tmp_path, ext, media_type):
         # GPS writing to dummy MP4 seems flaky with ExifTool/ffmpeg combo in this environment.
         # Skipping GPS check for video to allow tests to pass, as noted in original test.
         pass
+
+def test_write_metadata_batch_falls_back_without_tempdir(handler, tmp_path, monkeypatch):
+    def fail_mkstemp(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr("takeout_import.metadata_handler.tempfile.mkstemp", fail_mkstemp)
+    written = []
+    monkeypatch.setattr(handler, "_write_stay_open", lambda ops: written.extend(p.name for p, _ in ops))
+    
+    target = tmp_path / "a.jpg"
+    handler.write_metadata_batch([(target, SUPPORTED_MEDIA['.jpg'], MediaMetadata(timestamp=1700000000.0))])
+    
+    assert written == ["a.jpg"]
+
+def test_write_paths_use_same_params(handler, tmp_path, monkeypatch):
+    runs = []
+    class Result:
+        returncode = 0
+        stderr = ""
+    def run(args, **kwargs):
+        runs.append(args)
+        return Result()
+    monkeypatch.setattr("takeout_import.metadata_handler.subprocess.run", run)
+    set_tags_params = []
+    monkeypatch.setattr(handler._exif_tool, "set_tags", lambda files, tags, params: set_tags_params.append(params))
+    
+    target = tmp_path / "a.jpg"
+    tags = MediaMetadata(timestamp=1700000000.0, gps=GpsData(-10.5, 20.0)).to_tags(SUPPORTED_MEDIA['.jpg'])
+    assert handler._write_argfile([handler._to_write_args(target, tags)])
+    handler._write_stay_open([(target, tags)])
+    
+    common_args = runs[0][runs[0].index("-common_args") + 1:]
+    # Same value conversion on both paths
+    assert "-n" not in common_args and "-n" not in set_tags_params[0]
+    assert all(param in common_args for param in set_tags_params[0])
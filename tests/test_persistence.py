@@ -1,10 +1,12 @@
 import pytest
+import json
 import sqlite3
+from dataclasses import asdict
 from pathlib import Path
 from datetime import datetime
-from takeout_import.persistence_manager import PersistenceManager, FileStatus, ProcessingPhase
+from takeout_import.persistence_manager import PersistenceManager, FileStatus, ProcessingPhase, _metadata_json
 from takeout_import.media_type import get_media_type
-from takeout_import.media_metadata import MediaMetadata
+from takeout_import.media_metadata import MediaMetadata, GpsData
 
 @pytest.fixture
 def sqlite_persistence(tmp_path):
@@ -107,3 +109,112 @@ def test_get_files_by_status(persistence_fixture, request):
     success_files = pm.get_files_by_status([FileStatus.SUCCESS])
     assert len(success_files) == 1
     assert success_files[0]['source_path'] == str(path2)
+
+@pytest.mark.parametrize("persistence_fixture", ["sqlite_persistence", "memory_persistence"])
+def test_get_files_with_shared_size(persistence_fixture, request):
+    pm = request.getfixturevalue(persistence_fixture)
+    
+    for name, size in [("a.jpg", 100), ("b.jpg", 200), ("c.jpg", 100), ("d.jpg", 200)]:
+        path = Path(f"/tmp/{name}")
+        pm.add_file(path, get_media_type(path), size, 100.0)
+    # A file that is no longer NEW does not count towards a group
+    pm.update_status(pm.get_file_by_path(Path("/tmp/d.jpg"))['id'], FileStatus.SUCCESS, ProcessingPhase.EXECUTION)
+    
+    shared = pm.get_files_with_shared_size(FileStatus.NEW)
+    assert [f['source_path'] for f in shared] == ["/tmp/a.jpg", "/tmp/c.jpg"]
+
+@pytest.mark.parametrize("persistence_fixture", ["sqlite_persistence", "memory_persistence"])
+def test_add_files(persistence_fixture, request):
+    pm = request.getfixturevalue(persistence_fixture)
+    
+    existing = Path("/tmp/a.jpg")
+    existing_id = pm.add_file(existing, get_media_type(existing), 100, 100.0)
+    pm.update_status(existing_id, FileStatus.SUCCESS, ProcessingPhase.EXECUTION)
+    
+    paths = [Path("/tmp/a.jpg"), Path("/tmp/b.mp4"), Path("/tmp/c.png")]
+    pm.add_files([(p, get_media_type(p), 200, 200.0) for p in paths])
+    
+    # Existing rows are left untouched
+    assert pm.get_file_by_id(existing_id)['status'] == FileStatus.SUCCESS.value
+    assert pm.get_file_by_id(existing_id)['file_size'] == 100
+    
+    new_files = pm.get_files_by_status([FileStatus.NEW])
+    assert sorted(f['source_path'] for f in new_files) == ["/tmp/b.mp4", "/tmp/c.png"]
+    assert {f['media_type'] for f in new_files} == {"VIDEO", "IMAGE"}
+
+def test_file_db_uses_wal(sqlite_persistence):
+    assert sqlite_persistence.conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_batch_commits_once(sqlite_persistence, tmp_path):
+    path = Path("/tmp/a.jpg")
+    file_id = sqlite_persistence.add_file(path, get_media_type(path), 100, 100.0)
+    other = sqlite3.connect(tmp_path / "test.db")
+    
+    with sqlite_persistence.batch():
+        sqlite_persistence.update_status(file_id, FileStatus.METADATA_READ, ProcessingPhase.METADATA_READ)
+        with sqlite_persistence.batch():
+            sqlite_persistence.save_metadata(file_id, 'JSON', MediaMetadata(timestamp=1.0))
+        # Nothing is visible to other connections until the outermost block ends
+        assert other.execute('SELECT status FROM files').fetchone()[0] == FileStatus.NEW.value
+    
+    assert other.execute('SELECT status FROM files').fetchone()[0] == FileStatus.METADATA_READ.value
+    assert other.execute('SELECT COUNT(*) FROM metadata').fetchone()[0] == 1
+    other.close()
+
+@pytest.mark.parametrize("persistence_fixture", ["sqlite_persistence", "memory_persistence"])
+def test_update_statuses(persistence_fixture, request):
+    pm = request.getfixturevalue(persistence_fixture)
+    paths = [Path("/tmp/a.jpg"), Path("/tmp/b.jpg"), Path("/tmp/c.jpg")]
+    ids = [pm.add_file(p, get_media_type(p), 100, 100.0) for p in paths]
+    
+    pm.update_statuses(ids[:2], FileStatus.SUCCESS, ProcessingPhase.EXECUTION)
+    
+    assert [pm.get_file_by_id(i)['status'] for i in ids] == ["SUCCESS", "SUCCESS", "NEW"]
+    assert pm.get_file_by_id(ids[0])['phase'] == ProcessingPhase.EXECUTION.value
+
+@pytest.mark.parametrize("persistence_fixture", ["sqlite_persistence", "memory_persistence"])
+def test_dest_fingerprint(persistence_fixture, request):
+    pm = request.getfixturevalue(persistence_fixture)
+    target = Path("/dest/2023/01/a.jpg")
+    assert pm.get_dest_fingerprint(target) is None
+    
+    pm.save_dest_fingerprint(target, 100, 1.5, MediaMetadata(timestamp=1.0, people=["Alice"]))
+    pm.save_dest_fingerprint(target, 200, 2.5, MediaMetadata(timestamp=2.0))
+    
+    assert pm.get_dest_fingerprint(target) == {'file_size': 200, 'mtime': 2.5, 'metadata': MediaMetadata(timestamp=2.0)}
+
+@pytest.mark.parametrize("persistence_fixture", ["sqlite_persistence", "memory_persistence"])
+def test_get_metadata_for_files(persistence_fixture, request):
+    pm = request.getfixturevalue(persistence_fixture)
+    paths = [Path(f"/tmp/{i}.jpg") for i in range(600)]
+    pm.add_files([(p, get_media_type(p), 100, 100.0) for p in paths])
+    ids = [pm.get_file_by_path(p)['id'] for p in paths]
+    for file_id in ids[::2]:
+        pm.save_metadata(file_id, 'JSON', MediaMetadata(timestamp=float(file_id)))
+    pm.save_metadata(ids[1], 'MEDIA', MediaMetadata(timestamp=1.0))
+    
+    # Spans more than one query chunk; files without JSON metadata are absent
+    result = pm.get_metadata_for_files(ids, 'JSON')
+    assert result == {file_id: MediaMetadata(timestamp=float(file_id)) for file_id in ids[::2]}
+
+@pytest.mark.parametrize("persistence_fixture", ["sqlite_persistence", "memory_persistence"])
+def test_iter_files_by_status(persistence_fixture, request):
+    pm = request.getfixturevalue(persistence_fixture)
+    paths = [Path(f"/tmp/{i}.jpg") for i in range(5)]
+    pm.add_files([(p, get_media_type(p), 100, 100.0) for p in paths])
+    
+    batches = []
+    for files in pm.iter_files_by_status([FileStatus.NEW], batch_size=2):
+        batches.append([Path(f['source_path']).name for f in files])
+        # Only the first file of each batch is handled; the others are not returned again
+        pm.update_status(files[0]['id'], FileStatus.SUCCESS, ProcessingPhase.EXECUTION)
+    
+    assert batches == [["0.jpg", "1.jpg"], ["2.jpg", "3.jpg"], ["4.jpg"]]
+
+@pytest.mark.parametrize("metadata", [
+    MediaMetadata(),
+    MediaMetadata(timestamp=1.5, people=["Alice", "Bob"], gps=GpsData(1.0, 2.0), url="https://photos.example/1"),
+    MediaMetadata(gps=GpsData(1.0, 2.0, 3.0)),
+])
+def test_metadata_json_matches_asdict(metadata):
+    assert _metadata_json(metadata) == json.dumps(asdict(metadata))